@@ -0,0 +1,27 @@
+#
+# abledger's engine as a library; abledger.py is the command line front end
+#
+#   import ablib
+#   ledger = ablib.Ledger(input='ledgers/*.csv', accounts='ledgers/accounts.dat')
+#   for account in ledger.run().values():
+#     print(account.name, account.chargeableBetween('2015-04-06-00-00', '2016-04-05-23-59'))
+#
+
+from .util import TOLERANCE, FLOAT_ZERO, dateToMinutes, minutesToDate
+from .dates import dayOrdinal, dayOrdinals, numberDaysBetween, daysUntil, taxYearOf, taxYearStart, taxYearEnd, taxYearBounds
+from .symbols import SymbolTable, symbols
+from .files import readData, openText, openLines, stripCompression
+from .profile import Profiler
+from .converter import CurrencyConverter
+from .parsers import InputTX, FileReader, PARSER_VERSION
+from .cache import LedgerCache
+from .output import FileWriter, readLedgerColumns, writeMergedLedger
+from .accounts import Account, TX, FixedPointAccount, FixedPointTX, BaseAccount, FixedPointBaseAccount, divRound, createTXid
+from .transfers import transferHandler
+from .snapshots import saveSnapshot, loadSnapshot, IncrementalState
+from .ledger import Ledger, accountPrefixOf
+from .validate import PARSE, VALUATION, CONSISTENCY, LedgerError, validateInputs, exitCode, errorReport
+from .coverage import Coverage, hourOf, dateOfHour, coverageReport
+from .server import QueryServer
+from .scenarios import ScenarioRunner, loadScenarios
+from .series import portfolioSeries, writeSeries, readSeries
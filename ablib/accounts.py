@@ -0,0 +1,620 @@
+#
+# Section 104 pooled accounts with "bed and breakfast" matching of disposals
+#
+
+import re
+import math
+import hashlib
+import base64
+import operator
+import itertools
+import collections
+
+from .util import TOLERANCE, FLOAT_ZERO
+from .dates import dayOrdinal
+from .symbols import symbols
+from .profile import Profiler
+from .output import FileWriter
+
+class Account:
+  amountScale = 1 # see FixedPointAccount
+  debtTolerance = TOLERANCE
+  bbDays = 30 # disposals are matched with acquisitions within this many days
+
+  def __init__(self, _id, _currId, _baseId, _profiler=None, _outputFormat='formula', _outputDirectory='./output/'):
+    self.id = _id
+    self.currencyId = _currId
+    self.baseId = _baseId
+    self.name = symbols.name(_id)
+    self.currency = symbols.name(_currId) # name of foreign currency
+    self.base = symbols.name(_baseId)
+    self.profiler = _profiler or Profiler()
+    self.runs = [] # input txs in runs sorted by processing order, see addTX
+    self.txCount = 0
+    self.ledger = [] # ordered list of transactions
+    self.queue = [] # "bed and breakfast" queue 
+    self.balance = 0.0 # ongoing balance in foreign currency
+    self.profit = 0.0 # total profit in base currency
+    self.poolBalance = 0.0 # in foreign currency '_name'
+    self.poolCost = 0.0 # in base currency
+    self.chargeable = 0.0 # gains in base (on disposals while account above zero)
+    self.warning = False
+    self.checkpoints = [] # state at the start of each month, for incremental runs
+    self.poolHistory = [] # (date, poolBalance, poolCost) after each processed date
+    self.earliestDate = None # of the ledger, set by process (None while empty)
+    self.latestDate = None
+    self.output = FileWriter(self.name, self.name, self.base, self.currency, _outputFormat, _outputDirectory)
+
+  def __str__(self):
+    return '%s {balance: %f,   \tcost: %f, \tchargeable: %f}' % (self.name, self.totalBalance(), self.poolCost, self.chargeable)
+
+  def poolRate(self):
+    if abs(self.poolBalance) < FLOAT_ZERO:
+      return 0.0
+    else:
+      return max(0.0, self.poolCost / self.poolBalance)
+
+  def totalBetween(self, attrName, startDate, endDate):
+    #print("DEBUG: %s.%s between %s and %s" % (attrName, self.name, startDate, endDate))
+    v = 0.0
+    for tx in self.ledger:
+      if tx.date < startDate: continue
+      elif tx.date > endDate: continue
+      #elif tx.date > endDate: break
+      v += getattr(tx, attrName)
+    return v
+   
+  def profitBetween(self, startDate, endDate):
+    return self.totalBetween('profit', startDate, endDate)
+
+  def chargeableBetween(self, startDate, endDate):
+    return self.totalBetween('chargeable', startDate, endDate)
+
+  def balanceAt(self, endDate):
+    if self.earliestDate is None:
+      return 0.0
+    return self.totalBetween('amount', self.earliestDate, endDate)
+  
+  def costAt(self, endDate):
+    if self.earliestDate is None:
+      return 0.0
+    return self.totalBetween('value', self.earliestDate, endDate)
+
+  def totalBalance(self):
+    if self.earliestDate is None:
+      return 0.0
+    return self.totalBetween('amount', self.earliestDate, self.latestDate)
+
+  def totalCost(self):
+    if self.earliestDate is None:
+      return 0.0
+    return self.totalBetween('value', self.earliestDate, self.latestDate)
+
+  def proceedsBetween(self, startDate, endDate):
+    n = 0.0
+    p = 0.0
+    for tx in self.ledger:
+      if tx.date < startDate: continue
+      elif tx.date > endDate: continue
+      #elif tx.date > endDate: break
+      elif tx.disposal:
+        p += -tx.value
+        n += 1
+    return (p, n)
+
+  def clearQueueToDate(self, _d, _limit):
+    day = dayOrdinal(_d)
+    while len(self.queue) > 0 and day - dayOrdinal(self.queue[0].date) > _limit:
+      self.addTXtoPool(self.queue.pop(0))
+      self.profiler.count('bbQueuePooled')
+
+  def clearQueue(self):
+    for tx in self.queue:
+      self.addTXtoPool(tx)
+    self.profiler.count('bbQueuePooled', len(self.queue))
+    self.queue.clear()
+
+  def addTXtoPool(self, _tx):
+    (a, v) = _tx.useUp()
+
+    # a >= 0: deposit - not chargeable
+    # self.poolBalance <= 0: debt account - not chargeable
+    g = 0.0
+    c = 0.0
+    b = 0.0
+    p = 0.0
+    #print("DEBUG: adding TX{%f %s, %f %s) to Pool{%f %s, %f %s}" % (a, self.name, v, self.base, self.poolBalance, self.name, self.poolCost, self.base))
+
+    if a < -FLOAT_ZERO and self.poolBalance > FLOAT_ZERO:
+      # disposal from an account in credit
+      _tx.disposal = True
+      c = min(self.poolBalance, -a)
+      # cost basis of this amount based on aggregated acquisition
+      b = c * self.poolRate()
+      # gain
+      g = (v * c / a) - b
+      p = g
+      self.poolCost = (self.poolBalance + a) / self.poolBalance * self.poolCost
+    elif a > FLOAT_ZERO and self.poolBalance < -FLOAT_ZERO:
+      # deposit on account in debt
+      c = min(-self.poolBalance, a)
+      b = c * self.poolRate()
+      p = (v * c / a) - b
+      self.poolCost = (self.poolBalance + a) / self.poolBalance * self.poolCost
+    else:
+      self.poolCost += v
+
+    _tx.addProfitAndChargeable(p, g)
+    self.poolBalance += a
+    #print("%s, %s, %s, %s, %f, %f, %f, %f, %f, %f" % (_tx.id, _tx.date, ('buy', 'sell')[_tx.amount < 0.0], "pool", a, v, p, g, self.poolBalance, self.poolCost))
+
+    self.checkDebt(a, _tx.date)
+
+  def checkDebt(self, _a, _date):
+    # warn if in debt
+    if self.poolBalance < -self.debtTolerance and not self.warning and self.id != self.baseId and abs(_a) > self.debtTolerance:
+      self.warning = True
+      print('WARNING: disposal of unowned assets in "%s" account: poolBalance = %f, disposal = %f, date = %s' % (self.name, self.poolBalance / self.amountScale, _a / self.amountScale, _date))
+
+  def processTX(self, _tx):
+    _tx.ledgerIndex = len(self.ledger)
+    self.ledger.append(_tx)
+    if _tx.amount < -FLOAT_ZERO:
+      # set chargeable status
+      # only the balance on the account counts as a chargeable disposal
+      #if self.balance < -FLOAT_ZERO:
+      #  _tx.chargeableMultiplier = 0.0
+      #elif self.balance + _tx.amount < -FLOAT_ZERO:
+      #  _tx.chargeableMultiplier = max(0, self.balance / abs(_tx.amount))
+      #else:
+      _tx.chargeableMultiplier = 1
+      self.queue.append(_tx)
+      self.profiler.count('bbQueuePushes')
+    else:
+      # deposits not chargeable
+      _tx.chargeableMultiplier = 0
+
+      # calculate profit; first in, last out
+      while len(self.queue) > 0 and self.queue[len(self.queue) - 1]._unusedAmount + _tx._unusedAmount > FLOAT_ZERO:
+        qtx = self.queue.pop()
+        self.profiler.count('bbQueueMatches')
+        (a, v) = qtx.useUp()
+        p = _tx.adjust(a) - v
+        g = p * qtx.chargeableMultiplier
+        qtx.addProfitAndChargeable(p, g)
+        qtx.disposal = True
+        
+      if len(self.queue) > 0:
+        qtx = self.queue[len(self.queue) - 1]
+        self.profiler.count('bbQueueMatches')
+        (a, v) = _tx.useUp()
+        p = qtx.adjust(a) - v
+        g = p * qtx.chargeableMultiplier
+        qtx.addProfitAndChargeable(p, g)
+        qtx.disposal = True
+
+      else:
+        self.addTXtoPool(_tx)
+
+    self.balance += _tx.amount
+
+
+  def addTX(self, _tx):
+    # txs are processed by date, each date's sells before its buys (so that
+    # sells match buys on the same day if available), otherwise in the order
+    # added. Exports come in date order, one way round or the other, so txs
+    # are kept in runs already in that order: each tx extends the latest run
+    # at either end, or starts a new one
+    _tx.order = (_tx.date, _tx.amount >= 0, self.txCount)
+    self.txCount += 1
+    if len(self.runs) > 0:
+      run = self.runs[-1]
+      if _tx.order > run[-1].order:
+        run.append(_tx)
+        return
+      if _tx.order < run[0].order:
+        run.appendleft(_tx)
+        return
+    self.runs.append(collections.deque([_tx]))
+
+  def orderedTXs(self):
+    # all input txs in processing order: a merge of the runs. list.sort finds
+    # the runs and merges them (O(n log k)) in C, which costs far less per tx
+    # than heapq.merge
+    if len(self.runs) == 1:
+      return self.runs[0]
+    txs = list(itertools.chain.from_iterable(self.runs))
+    txs.sort(key=operator.attrgetter('order'))
+    return txs
+
+  def process(self, _fromDate='', _checkpoints=False, _closingState=False):
+    # _fromDate: earlier dates are already in the ledger (see resumeFrom)
+    # _checkpoints: keep the state at the start of each month (incremental runs)
+    # _closingState: keep the end of period state (snapshots)
+    if len(self.runs) == 0 and len(self.ledger) == 0:
+      # nothing to process, e.g. a base account that only sees trades
+      # between two other currencies (see the net_base option)
+      if _closingState:
+        self.closingState = self.state()
+      return
+    if len(self.ledger) > 0:
+      self.earliestDate = self.ledger[0].date # opening balance from a snapshot
+    else:
+      self.earliestDate = min(run[0].date for run in self.runs)
+    if len(self.runs) > 0:
+      self.latestDate = max(run[-1].date for run in self.runs)
+    else:
+      self.latestDate = self.earliestDate
+    self.profiler.count('sortedRuns', len(self.runs))
+    month = None
+    d = None
+    for tx in self.orderedTXs():
+      if tx.date < _fromDate: continue
+
+      if tx.date != d:
+        if d is not None:
+          self.poolHistory.append((d, self.poolBalance, self.poolCost))
+        d = tx.date
+
+        if _checkpoints and d[:7] != month:
+          month = d[:7]
+          self.checkpoints.append(self.checkpoint(d))
+
+        # match sells with buy within bbDays days if available, otherwise section 104 pool
+        self.clearQueueToDate(d, self.bbDays)
+
+      self.processTX(tx)
+
+    if d is not None:
+      self.poolHistory.append((d, self.poolBalance, self.poolCost))
+
+    # end of period state, before pending B&B disposals are pooled
+    if _closingState:
+      self.closingState = self.state()
+
+    self.clearQueue()
+    if len(self.poolHistory) > 0: # pending disposals pooled at the end
+      self.poolHistory.append((self.latestDate, self.poolBalance, self.poolCost))
+
+    for tx in self.ledger:
+      # record gains
+      self.profit += tx.profit
+      self.chargeable += tx.chargeable
+
+  def state(self):
+    # pool, pending B&B queue and cumulative totals, enough to carry on
+    # processing from this point in a later run
+    return {
+      'name': self.name,
+      'currency': self.currency,
+      'balance': self.balance,
+      'cost': sum(tx.value for tx in self.ledger),
+      'poolBalance': self.poolBalance,
+      'poolCost': self.poolCost,
+      'profit': self.profit + sum(tx.profit for tx in self.ledger),
+      'chargeable': self.chargeable + sum(tx.chargeable for tx in self.ledger),
+      'warning': self.warning,
+      'queue': [tx.state() for tx in self.queue]
+    }
+
+  def restore(self, _state, _date):
+    self.balance = _state['balance']
+    self.poolBalance = _state['poolBalance']
+    self.poolCost = _state['poolCost']
+    self.profit = _state['profit']
+    self.chargeable = _state['chargeable']
+    self.warning = _state['warning']
+    self.queue = [txFromState(s) for s in _state['queue']]
+    # opening balance and cost, already accounted for in the pool and queue
+    opening = TX(_state['balance'], 0.0, _date, createTXid(self.name, self.base, _state['cost'], _date, 'snapshot'))
+    opening.value = _state['cost']
+    opening.useUp()
+    self.ledger.append(opening)
+
+  def checkpoint(self, _date):
+    # state before processing _date; ledger rows before this point are final
+    # apart from the queued disposals, whose state is kept here
+    return {
+      'date': _date,
+      'ledgerLength': len(self.ledger),
+      'balance': self.balance,
+      'poolBalance': self.poolBalance,
+      'poolCost': self.poolCost,
+      'warning': self.warning,
+      'queue': [(tx.ledgerIndex, tx.state()) for tx in self.queue]
+    }
+
+  def resumeFrom(self, _checkpoint, _rows, _disposals=()):
+    # rebuild the ledger up to a checkpoint from a previous run's final rows;
+    # _disposals are the ledger indexes of its disposals, which rows lack
+    self.ledger = [txFromRow(row) for row in _rows[:_checkpoint['ledgerLength']]]
+    for (i, tx) in enumerate(self.ledger):
+      tx.ledgerIndex = i
+    for i in _disposals:
+      if i < len(self.ledger):
+        self.ledger[i].disposal = True
+    self.queue = []
+    for (i, s) in _checkpoint['queue']:
+      tx = txFromState(s)
+      tx.ledgerIndex = i
+      self.ledger[i] = tx
+      self.queue.append(tx)
+    self.balance = _checkpoint['balance']
+    self.poolBalance = _checkpoint['poolBalance']
+    self.poolCost = _checkpoint['poolCost']
+    self.warning = _checkpoint['warning']
+
+  def write(self):
+    for tx in self.ledger:
+      self.output.addline(tx.date, tx.id, tx.value, tx.amount, tx.chargeable, tx.profit)
+    self.output.close()
+
+  def __str__(self):
+    txss = "..."
+    #for tx in self.orderedTXs():
+    #  txss += str(tx) + "\n"
+    txls = ""
+    for tx in self.ledger:
+      txls += str(tx) + "\n"
+    return "%s\ntxs:\n%sledger:\n%s" % (self.name, txss, txls)
+
+
+class FixedPointAccount(Account):
+  # Account processed on scaled integers: amounts in FixedPointTX.AMOUNT_SCALE
+  # units of the account currency and values in FixedPointTX.VALUE_SCALE units
+  # of the base. Every division is rounded half to even by divRound, and the
+  # pool cost removed by a disposal is the cost before less the rounded cost
+  # after, so the pool never drifts. The ledger is handed back as floats once
+  # processed, so reporting and output are the same as for Account.
+  amountScale = 10 ** 8
+  debtTolerance = round(TOLERANCE * 10 ** 8)
+
+  def addTXtoPool(self, _tx):
+    (a, v) = _tx.useUp()
+
+    # a >= 0: deposit - not chargeable
+    # self.poolBalance <= 0: debt account - not chargeable
+    g = 0
+    p = 0
+
+    if a < 0 and self.poolBalance > 0:
+      # disposal from an account in credit
+      _tx.disposal = True
+      c = min(self.poolBalance, -a)
+      remaining = divRound((self.poolBalance + a) * self.poolCost, self.poolBalance)
+      if c == -a and self.poolCost > 0:
+        b = self.poolCost - remaining
+      else:
+        b = max(0, divRound(c * self.poolCost, self.poolBalance))
+      g = divRound(v * c, a) - b
+      p = g
+      self.poolCost = remaining
+    elif a > 0 and self.poolBalance < 0:
+      # deposit on account in debt
+      c = min(-self.poolBalance, a)
+      b = max(0, divRound(c * self.poolCost, self.poolBalance))
+      p = divRound(v * c, a) - b
+      self.poolCost = divRound((self.poolBalance + a) * self.poolCost, self.poolBalance)
+    else:
+      self.poolCost += v
+
+    _tx.addProfitAndChargeable(p, g)
+    self.poolBalance += a
+    self.checkDebt(a, _tx.date)
+
+  def process(self, _fromDate='', _checkpoints=False, _closingState=False):
+    if _checkpoints or _closingState:
+      exit('ERROR: fixed point accounts do not support snapshots or incremental runs')
+    Account.process(self, _fromDate)
+
+    (amountScale, valueScale) = (FixedPointTX.AMOUNT_SCALE, FixedPointTX.VALUE_SCALE)
+    for tx in self.ledger:
+      tx.toFloat()
+    self.poolHistory = [(d, b / amountScale, c / valueScale) for (d, b, c) in self.poolHistory]
+    self.balance /= amountScale
+    self.poolBalance /= amountScale
+    self.poolCost /= valueScale
+    self.profit /= valueScale
+    self.chargeable /= valueScale
+    self.amountScale = 1
+
+
+class BaseAccount(Account):
+  # Account in the base currency: a tx valued at its own amount can make no
+  # gain, so there is nothing to match or pool. Txs only go on the ledger, and
+  # the pool is the running balance and cost. An account with a tx valued
+  # otherwise (e.g. from a bootstrap row) is pooled as usual.
+  def __init__(self, *_args, **_kwargs):
+    Account.__init__(self, *_args, **_kwargs)
+    self.pooled = False
+
+  def valuedAtAmount(self, _tx):
+    return _tx.amount == _tx.value
+
+  def addTX(self, _tx):
+    if not self.valuedAtAmount(_tx):
+      self.pooled = True
+    Account.addTX(self, _tx)
+
+  def restore(self, _state, _date):
+    Account.restore(self, _state, _date)
+    self.pooled = self.pooled or len(self.queue) > 0
+
+  def resumeFrom(self, _checkpoint, _rows, _disposals=()):
+    Account.resumeFrom(self, _checkpoint, _rows, _disposals)
+    self.pooled = self.pooled or len(self.queue) > 0
+
+  def processTX(self, _tx):
+    if self.pooled:
+      Account.processTX(self, _tx)
+      return
+    _tx.ledgerIndex = len(self.ledger)
+    self.ledger.append(_tx)
+    _tx.chargeableMultiplier = 0
+    (a, v) = _tx.useUp()
+    self.balance += a
+    self.poolBalance += a
+    self.poolCost += v
+    self.checkDebt(a, _tx.date)
+
+
+class FixedPointBaseAccount(BaseAccount, FixedPointAccount):
+  # BaseAccount on scaled integers. Amounts and values are on different
+  # scales (see FixedPointTX), so a tx is valued at its own amount when the
+  # two agree to within the rounding of the value.
+  def valuedAtAmount(self, _tx):
+    return abs(divRound(_tx.amount, FixedPointTX.AMOUNT_SCALE // FixedPointTX.VALUE_SCALE) - _tx.value) <= 1
+
+
+class TX:
+  def __init__(self, _a, _v, _d, _id):
+    #print("DEBUG TX.__init__(%f, %f, %s)" % (_a, _v, _d))
+
+    self.profit = 0.0 # in base
+    self.chargeable = 0.0 # in base
+    self.amount = _a # in foreign currency (negative is disposal)
+    self.value = math.copysign(_v, _a) # in GBP (base should be same as amount)
+    self._unusedAmount = self.amount
+    self._unusedValue = self.value
+    self.date = _d
+    self.id = _id
+    self.chargeableMultiplier = float(_a < 0.0) # depends also on account balance when tx is executed
+    self.disposal = False # set once the tx draws on the pool or is matched with an acquisition
+    if abs(_a) > FLOAT_ZERO:
+      self.rate = _v / _a
+    else:
+      self.rate = 0.0
+
+  def __str__(self):
+    datestr = re.sub('-', '/', self.date[:10]) + ' ' + re.sub('-', ':', self.date[11:16])
+    return 'amount = %f; value = %f; rate = %f; unused{amount = %f; value = %f}; profit = %f; chargeable = %f; (%s)' % (self.amount, self.value, self.rate, self._unusedAmount, self._unusedValue, self.profit, self.chargeable, datestr)
+
+  def addProfitAndChargeable(self, _p, _c):
+    self.profit += _p
+    self.chargeable += _c
+    #if _c > _p + TOLERANCE: print("ARGH: %s :: profit: %f -> %f; chargeable: %f -> %f" % (self.date, self.profit - _p, self.profit, self.chargeable - _c, self.chargeable))
+
+  def adjust(self, _a):
+    if abs(_a) <= FLOAT_ZERO:
+      return 0.0
+    if self._unusedAmount * _a > 0.0:
+      exit("ERROR: TX.adjust: attempt to add further to a tx (tx amount = %f; adjust amount = %f)" % (self._unusedAmount, _a))
+    if abs(_a) - abs(self._unusedAmount) > FLOAT_ZERO:
+      exit("ERROR: TX.adjust: attempt to adjust by more than available (tx amount = %f; adjust amount = %f)" % (self._unusedAmount, _a))
+    self._unusedAmount += _a
+    v = self._unusedValue
+    self._unusedValue += _a * self.rate
+    return self._unusedValue - v # value of adjustment, i.e. new = old + return_value
+
+  def useUp(self):
+    a = self._unusedAmount
+    v = self._unusedValue
+    self._unusedAmount = 0.0
+    self._unusedValue = 0.0
+    return (a, v)
+
+  def state(self):
+    return {
+      'date': self.date,
+      'id': self.id,
+      'amount': self.amount,
+      'value': self.value,
+      'rate': self.rate,
+      'unusedAmount': self._unusedAmount,
+      'unusedValue': self._unusedValue,
+      'chargeableMultiplier': self.chargeableMultiplier,
+      'disposal': self.disposal,
+      'profit': self.profit,
+      'chargeable': self.chargeable
+    }
+
+class FixedPointTX(TX):
+  # TX on scaled integers (see FixedPointAccount); the unused value is always
+  # recomputed from the whole tx, so repeated adjustments cannot drift
+  AMOUNT_SCALE = 10 ** 8 # satoshis
+  VALUE_SCALE = 10 ** 2 # pence
+
+  def __init__(self, _a, _v, _d, _id):
+    # _a and _v are floats, scaled and rounded here
+    a = round(_a * self.AMOUNT_SCALE)
+    v = round(abs(_v) * self.VALUE_SCALE)
+    self.profit = 0
+    self.chargeable = 0
+    self.amount = a
+    self.value = (v, -v)[a < 0]
+    self._unusedAmount = self.amount
+    self._unusedValue = self.value
+    self.date = _d
+    self.id = _id
+    self.chargeableMultiplier = int(a < 0)
+    self.disposal = False
+    self.rate = 0.0 # not used for arithmetic, set by toFloat
+
+  def adjust(self, _a):
+    if _a == 0:
+      return 0
+    if self._unusedAmount * _a > 0:
+      exit("ERROR: TX.adjust: attempt to add further to a tx (tx amount = %d; adjust amount = %d)" % (self._unusedAmount, _a))
+    if abs(_a) > abs(self._unusedAmount):
+      exit("ERROR: TX.adjust: attempt to adjust by more than available (tx amount = %d; adjust amount = %d)" % (self._unusedAmount, _a))
+    self._unusedAmount += _a
+    v = self._unusedValue
+    # divRound(self.value * self._unusedAmount, self.amount), inlined as
+    # this is the hot path of B&B matching
+    (n, d) = (self.value * self._unusedAmount, self.amount)
+    if d < 0:
+      (n, d) = (-n, -d)
+    (q, r) = divmod(n, d)
+    if 2 * r > d or (2 * r == d and q & 1):
+      q += 1
+    self._unusedValue = q
+    return q - v # value of adjustment, i.e. new = old + return_value
+
+  def toFloat(self):
+    (amountScale, valueScale) = (self.AMOUNT_SCALE, self.VALUE_SCALE)
+    self.amount /= amountScale
+    self.value /= valueScale
+    self._unusedAmount /= amountScale
+    self._unusedValue /= valueScale
+    self.profit /= valueScale
+    self.chargeable /= valueScale
+    self.rate = (self.value / self.amount) if self.amount != 0 else 0.0
+
+def divRound(_n, _d):
+  # _n / _d for integers, rounded to the nearest integer, halves to even
+  if _d < 0:
+    (_n, _d) = (-_n, -_d)
+  (q, r) = divmod(_n, _d)
+  if 2 * r > _d or (2 * r == _d and q % 2 == 1):
+    q += 1
+  return q
+
+def txFromRow(_row):
+  # (date, id, value, amount, chargeable, profit) as written by FileWriter
+  (date, id_, value, amount, chargeable, profit) = _row
+  tx = TX(amount, abs(value), date, id_)
+  tx.value = value
+  tx.useUp()
+  tx.profit = profit
+  tx.chargeable = chargeable
+  return tx
+
+def txFromState(_s):
+  tx = TX(_s['amount'], abs(_s['value']), _s['date'], _s['id'])
+  tx.value = _s['value']
+  tx.rate = _s['rate']
+  tx._unusedAmount = _s['unusedAmount']
+  tx._unusedValue = _s['unusedValue']
+  tx.chargeableMultiplier = _s['chargeableMultiplier']
+  tx.disposal = _s.get('disposal', False) # not in older snapshots
+  tx.profit = _s['profit']
+  tx.chargeable = _s['chargeable']
+  return tx
+
+def createTXid(acc1, acc2, val, date, salt):
+  # deterministic across runs (unlike hash()), so output, caches and
+  # incremental state can be keyed and diffed on ids; the salt (source file and
+  # line) keeps otherwise identical rows apart
+  canonical = '%s\x1f%s\x1f%r\x1f%s\x1f%s' % (acc1, acc2, val, date, salt)
+  digest = hashlib.blake2b(canonical.encode(), digest_size=10).digest()
+  return base64.b32encode(digest).decode()
@@ -0,0 +1,96 @@
+#
+# On-disk (and optionally in-memory) cache of parsed ledger files
+#
+
+import os
+import hashlib
+import zlib
+import struct
+
+from .parsers import PARSER_VERSION, packParsed, unpackParsed
+
+class LedgerCache:
+  # Parsed ledger files stored as zlib-compressed columns, keyed by the hash of
+  # the source file contents, so only new or changed exports need parsing:
+  #   header: magic, version, conversions signature
+  #   followed by the parsed rows in packParsed form
+  VERSION = 3
+  HEADER = '<4sH64s'
+
+  def __init__(self, _directory, _conversionFiles, _base, _keepResident=False):
+    self.directory = _directory
+    self.base = _base
+    if self.directory != '':
+      os.makedirs(self.directory, exist_ok=True)
+    self.keepResident = _keepResident # also keep parsed ledgers in memory
+    self.resident = {}
+    self.used = set()
+    self.setConversionFiles(_conversionFiles)
+
+  def setConversionFiles(self, _conversionFiles):
+    signature = hashlib.sha256()
+    for filename in sorted(_conversionFiles):
+      stat = os.stat(filename)
+      signature.update(('%s %d %d\n' % (filename, stat.st_size, stat.st_mtime_ns)).encode())
+    self.conversionsSignature = signature.hexdigest()
+
+  def enabled(self):
+    return self.directory != '' or self.keepResident
+
+  def prune(self):
+    # forget in-memory entries not used since the last prune
+    for key in list(self.resident.keys()):
+      if key not in self.used:
+        del self.resident[key]
+    self.used.clear()
+
+  def key(self, _data, _name=''):
+    # _name: file name, which some parsers depend on (see PoloniexTransfersParser)
+    h = hashlib.sha256(_data)
+    h.update(('%d %d %s %s' % (self.VERSION, PARSER_VERSION, self.base, _name)).encode())
+    return h.hexdigest()
+
+  def _path(self, _key):
+    return os.path.join(self.directory, _key + '.ablc')
+
+  def load(self, _key):
+    if _key in self.resident:
+      (parsed, usesConversions, signature) = self.resident[_key]
+      if not usesConversions or signature == self.conversionsSignature:
+        self.used.add(_key)
+        return parsed
+    if self.directory == '':
+      return None
+    path = self._path(_key)
+    if not os.path.exists(path):
+      return None
+    with open(path, 'rb') as f:
+      data = zlib.decompress(f.read())
+    (magic, version, signature) = struct.unpack_from(self.HEADER, data)
+    if magic != b'ABLC' or version != self.VERSION:
+      return None
+    signature = signature.rstrip(b'\0').decode()
+    if signature != '' and signature != self.conversionsSignature:
+      return None # depends on conversion tables that have since changed
+    parsed = unpackParsed(data, struct.calcsize(self.HEADER))
+    if self.keepResident:
+      self.resident[_key] = (parsed, signature != '', self.conversionsSignature)
+      self.used.add(_key)
+    return parsed
+
+  def save(self, _key, _parsed, _usesConversions, _packed=None):
+    # _packed: the packParsed form of _parsed, if already at hand
+    if self.keepResident:
+      self.resident[_key] = (_parsed, _usesConversions, self.conversionsSignature)
+      self.used.add(_key)
+    if self.directory == '':
+      return
+    if _packed is None:
+      _packed = packParsed(_parsed)
+    signature = (b'', self.conversionsSignature.encode())[_usesConversions]
+    data = struct.pack(self.HEADER, b'ABLC', self.VERSION, signature) + _packed
+    # write atomically so an interrupted run never leaves a truncated entry
+    path = self._path(_key)
+    with open(path + '.tmp', 'wb') as f:
+      f.write(zlib.compress(data))
+    os.replace(path + '.tmp', path)
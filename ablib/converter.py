@@ -0,0 +1,107 @@
+#
+# Hourly currency conversion tables
+#
+
+from .util import extractCSVs, minutesToDate
+from .symbols import symbols
+from .profile import Profiler
+from .files import openLines
+from .coverage import Coverage
+
+
+class CurrencyConverter:
+  def __init__(self, _profiler=None):
+    self.conversions = {}
+    self.coverage = {} # per table, see coverage.py
+    self.fromCurrencies = []
+    self.toCurrencies = []
+    self.profiler = _profiler or Profiler()
+
+  def _formatDate(self, date):
+    return date[:-2] + "00" # ignore minutes
+
+  def currencies(self):
+    return self.fromCurrencies
+
+  def canConvertOn(self, date, fromCurrency, toCurrency):
+    self.profiler.count('conversionLookups')
+    date = self._formatDate(date)
+    symb = symbols.pair(fromCurrency, toCurrency)
+    return symb in self.conversions and date in self.conversions[symb]
+
+  def convert(self, date, fromCurrency, toCurrency, fromValue):
+    date = self._formatDate(date)
+    symb = symbols.pair(fromCurrency, toCurrency)
+    return fromValue * self.conversions[symb][date]
+
+  def convertMany(self, dates, fromCurrency, toCurrency, fromValues):
+    # bulk version of canConvertOn + convert for a single currency pair:
+    # each distinct date is looked up once and missing rates come back as None.
+    # Rates are exact to the hour (there is no fallback to an earlier one), so
+    # a hash lookup per date is all that is needed
+    symb = symbols.pair(fromCurrency, toCurrency)
+    self.profiler.count('conversionLookups', len(dates))
+    if symb not in self.conversions:
+      return [None] * len(dates)
+    table = self.conversions[symb]
+    rates = {date: table.get(self._formatDate(date)) for date in set(dates)}
+    values = []
+    for (date, fromValue) in zip(dates, fromValues):
+      rate = rates[date]
+      values.append(None if rate is None else fromValue * rate)
+    return values
+
+  def missingRates(self, needs, toCurrency):
+    # {currency: hours (see coverage.hourOf)} -> {currency: hours without a
+    # rate to toCurrency}, leaving out currencies that are fully covered
+    missing = {}
+    for (currency, hours) in needs.items():
+      coverage = self.coverage.get(symbols.pair(currency, toCurrency))
+      m = sorted(hours) if coverage is None else coverage.missing(hours)
+      if len(m) > 0:
+        missing[currency] = m
+    return missing
+
+  def _newTable(self, currFrom, currTo):
+    csym = symbols.pair(currFrom, currTo)
+    self.conversions[csym] = {}
+    if currFrom not in self.fromCurrencies: # unless reloading
+      self.fromCurrencies.append(currFrom)
+      self.toCurrencies.append(currTo)
+    return self.conversions[csym]
+
+  def addSeries(self, fromCurrency, toCurrency, series):
+    # (dates as minutes, rates) columns, e.g. from ablib.marketdata, in place
+    # of a conversion csv; later rates in the same hour take precedence
+    (dates, rates) = series
+    (currFrom, currTo) = (symbols.id(fromCurrency), symbols.id(toCurrency))
+    table = self._newTable(currFrom, currTo)
+    for (minutes, rate) in zip(dates, rates):
+      table[self._formatDate(minutesToDate(minutes))] = rate
+    self.coverage[symbols.pair(currFrom, currTo)] = Coverage(table)
+    return len(dates)
+
+  def loadPairData(self, filename):
+    print('Reading currency conversion data from %s ... ' % (filename), end='')
+    f = openLines(filename)
+    line = next(f, '')
+    entries = extractCSVs(line, 2, 1)
+    print('(' + ' -> '.join(entries) + ')')
+    (currFrom, currTo) = (symbols.id(entries[0]), symbols.id(entries[1]))
+    table = self._newTable(currFrom, currTo)
+    #rsym = currTo + currFrom
+    #ronversions[rsym] = {}
+    i = 1
+
+    lastt = 0
+
+    for line in f:
+      i += 1
+      entries = extractCSVs(line, 2, i)
+      date = self._formatDate(entries[0])
+      rate = float(entries[1])
+      table[date] = rate;
+      #ronversions[rsym][date] = 1.0 / rate;
+
+    self.coverage[symbols.pair(currFrom, currTo)] = Coverage(table)
+    return i - 1
@@ -0,0 +1,101 @@
+#
+# Conversion table coverage: the hours a table has rates for, as sorted
+# ranges, built when the table is loaded, so that every valuation the ledgers
+# need can be checked against it at once (--check-coverage) instead of
+# ingestion stopping at the first missing rate
+#
+
+import bisect
+import collections
+import datetime
+
+from .dates import dayOrdinal
+
+def hourOf(_date):
+  # %Y-%m-%d-%H-%M -> hours since 0001-01-01
+  return dayOrdinal(_date[:10]) * 24 + int(_date[11:13])
+
+def dateOfHour(_hour):
+  return '%s-%02d-00' % (datetime.date.fromordinal(_hour // 24).isoformat(), _hour % 24)
+
+def hourRanges(_hours):
+  # sorted hours -> [(first, last)] of consecutive runs
+  ranges = []
+  for h in _hours:
+    if len(ranges) > 0 and ranges[-1][1] == h - 1:
+      ranges[-1][1] = h
+    else:
+      ranges.append([h, h])
+  return [tuple(r) for r in ranges]
+
+
+def coveredRanges(_dates):
+  # dates (one per hour, as conversion table keys) -> hour ranges; tables
+  # mostly have all 24 hours of a day, so days are counted first and only
+  # the hours of incomplete days are looked at one by one
+  days = collections.Counter(d[:10] for d in _dates)
+  partial = {}
+  if len(days) * 24 > len(_dates):
+    for d in _dates:
+      if days[d[:10]] < 24:
+        partial.setdefault(d[:10], set()).add(int(d[11:13]))
+  ranges = []
+  for day in sorted(days):
+    o = dayOrdinal(day) * 24
+    if day in partial:
+      dayRanges = hourRanges(sorted(o + h for h in partial[day]))
+    else:
+      dayRanges = [(o, o + 23)]
+    for (a, b) in dayRanges:
+      if len(ranges) > 0 and ranges[-1][1] == a - 1:
+        ranges[-1][1] = b
+      else:
+        ranges.append([a, b])
+  return [tuple(r) for r in ranges]
+
+
+class Coverage:
+  # covered hours of one conversion table as disjoint ranges, in order
+  def __init__(self, _dates):
+    ranges = coveredRanges(_dates)
+    self.starts = [a for (a, b) in ranges]
+    self.ends = [b for (a, b) in ranges]
+
+  def __len__(self):
+    return len(self.starts)
+
+  def covers(self, _hour):
+    i = bisect.bisect_right(self.starts, _hour) - 1
+    return i >= 0 and _hour <= self.ends[i]
+
+  def gaps(self):
+    # [(first, last)] uncovered hours between the first and last rate
+    return [(self.ends[i] + 1, self.starts[i + 1] - 1) for i in range(len(self.starts) - 1)]
+
+  def missing(self, _hours):
+    # the hours of _hours without a rate, in order: one pass over both
+    missing = []
+    i = 0
+    n = len(self.starts)
+    for h in sorted(_hours):
+      while i < n and self.ends[i] < h:
+        i += 1
+      if i == n or h < self.starts[i]:
+        missing.append(h)
+    return missing
+
+
+def coverageReport(_missing, _base):
+  # {currency name: missing hours} -> text, one line per range of hours
+  lines = []
+  for (currency, hours) in sorted(_missing.items()):
+    ranges = hourRanges(hours)
+    lines.append('%s -> %s: %d hour(s) missing in %d range(s)' % (currency, _base, len(hours), len(ranges)))
+    for (a, b) in ranges:
+      if a == b:
+        lines.append('  %s' % dateOfHour(a))
+      else:
+        lines.append('  %s to %s (%d hours)' % (dateOfHour(a), dateOfHour(b), b - a + 1))
+  if len(lines) == 0:
+    lines.append('All valuations are covered by the conversion tables')
+  return '\n'.join(lines)
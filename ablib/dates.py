@@ -0,0 +1,43 @@
+#
+# Calendar helpers: dates (%Y-%m-%d-%H-%M, or any single character
+# separators) as proleptic Gregorian day ordinals, so that day differences are
+# integer subtractions and leap years count properly, and UK tax years
+# (6 April to 5 April)
+#
+
+import array
+import datetime
+import functools
+
+@functools.lru_cache(maxsize=1 << 16)
+def dayOrdinal(_date):
+  # days since 0001-01-01 (day 1); dates repeat a lot (and come in order),
+  # so they are memoised. Raises ValueError for an invalid date.
+  return datetime.date(int(_date[0:4]), int(_date[5:7]), int(_date[8:10])).toordinal()
+
+def dayOrdinals(_dates):
+  return array.array('l', map(dayOrdinal, _dates))
+
+def numberDaysBetween(_start, _end):
+  # whole days from _start to _end (negative if _end is earlier)
+  return dayOrdinal(_end) - dayOrdinal(_start)
+
+def daysUntil(_dates, _end):
+  # numberDaysBetween(d, _end) for each of _dates
+  end = dayOrdinal(_end)
+  return array.array('l', (end - d for d in dayOrdinals(_dates)))
+
+
+def taxYearOf(_date):
+  # the year a tax year starts in: 2015 for 2015-04-06 to 2016-04-05
+  return int(_date[0:4]) - ((int(_date[5:7]), int(_date[8:10])) < (4, 6))
+
+def taxYearStart(_year):
+  return '%04d-04-06-00-00' % _year
+
+def taxYearEnd(_year):
+  return '%04d-04-05-23-59' % (_year + 1)
+
+def taxYearBounds(_year):
+  # (start, end) dates of a tax year, as the --start and --end options
+  return (taxYearStart(_year), taxYearEnd(_year))
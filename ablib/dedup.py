@@ -0,0 +1,47 @@
+#
+# Rows repeated across overlapping exports of the same exchange (e.g. two
+# kraken trades downloads covering the same weeks)
+#
+
+import array
+import bisect
+import hashlib
+import heapq
+
+class FingerprintSet:
+  # 64 bit row fingerprints in a sorted array: 8 bytes per row, looked up by
+  # bisection; rows are added a file at a time
+  def __init__(self):
+    self.keys = array.array('Q')
+
+  def __len__(self):
+    return len(self.keys)
+
+  def __contains__(self, _key):
+    i = bisect.bisect_left(self.keys, _key)
+    return i < len(self.keys) and self.keys[i] == _key
+
+  def update(self, _keys):
+    # None keys (see rowFingerprints) are left out
+    self.keys = array.array('Q', heapq.merge(self.keys, sorted(k for k in _keys if k is not None)))
+
+
+def rowFingerprints(_prefix, _parsed, _content=False):
+  # one fingerprint per (line, InputTX): the exchange (account prefix), the
+  # exchange's own row id and the row's content, plus how many equal rows
+  # came before it in the same file, so that genuinely repeated rows within
+  # an export are only matched by as many repeats in another. Rows without
+  # an id (e.g. hand written files) may well repeat legitimately, so they
+  # get None (never matched) unless matching on _content alone is asked for
+  seen = {}
+  keys = []
+  for (ln, tx) in _parsed:
+    if tx.nativeId == 0 and not _content:
+      keys.append(None)
+      continue
+    content = '%s\x1f%d\x1f%s\x1f%d\x1f%d\x1f%r\x1f%d\x1f%d\x1f%r\x1f%d' % (_prefix, tx.nativeId, tx.date, tx.account1, tx.curr1, tx.amount1, tx.account2, tx.curr2, tx.amount2, tx.isTransfer)
+    n = seen.get(content, 0)
+    seen[content] = n + 1
+    digest = hashlib.blake2b(('%s\x1f%d' % (content, n)).encode(), digest_size=8).digest()
+    keys.append(int.from_bytes(digest, 'little'))
+  return keys
@@ -0,0 +1,220 @@
+#
+# Market data downloads (fetch.py): each Source knows what its download file
+# already holds and requests only what is missing, through a Fetcher that
+# spreads requests over threads under a rate limit. Transports get a request
+# path either from the api (optionally keeping a mirror of the responses) or
+# from such a mirror directory, so that runs can be reproduced offline.
+#
+
+import os
+import json
+import time
+import threading
+import urllib.parse
+import urllib.request
+import concurrent.futures
+
+from .util import dateToMinutes, minutesToDate
+
+
+class RateLimiter:
+  # at most _perSecond requests are started per second, across threads
+  def __init__(self, _perSecond):
+    self.interval = 1.0 / _perSecond if _perSecond > 0 else 0.0
+    self.next = 0.0
+    self.lock = threading.Lock()
+
+  def wait(self):
+    with self.lock:
+      now = time.monotonic()
+      start = max(now, self.next)
+      self.next = start + self.interval
+    if start > now:
+      time.sleep(start - now)
+
+
+def mirrorPath(_directory, _path):
+  # one file per request path (including the query)
+  return os.path.join(_directory, urllib.parse.quote(_path.lstrip('/'), safe=''))
+
+class HTTPTransport:
+  def __init__(self, _baseURL, _mirror='', _timeout=30):
+    self.baseURL = _baseURL.rstrip('/')
+    self.mirror = _mirror
+    self.timeout = _timeout
+    if _mirror != '':
+      os.makedirs(_mirror, exist_ok=True)
+
+  def get(self, _path):
+    with urllib.request.urlopen(self.baseURL + _path, timeout=self.timeout) as response:
+      data = response.read()
+    if self.mirror != '':
+      with open(mirrorPath(self.mirror, _path), 'wb') as f:
+        f.write(data)
+    return data
+
+class DirectoryTransport:
+  # responses from a mirror directory (see HTTPTransport) instead of the api
+  def __init__(self, _directory):
+    self.directory = _directory
+
+  def get(self, _path):
+    with open(mirrorPath(self.directory, _path), 'rb') as f:
+      return f.read()
+
+
+class Fetcher:
+  def __init__(self, _transport, _perSecond=1.0, _jobs=4):
+    self.transport = _transport
+    self.limiter = RateLimiter(_perSecond)
+    self.jobs = _jobs
+
+  def get(self, _path):
+    self.limiter.wait()
+    return self.transport.get(_path)
+
+  def getMany(self, _paths):
+    # yields (path, response) as they complete; failed requests are reported
+    # and left out, to be retried by the next run
+    with concurrent.futures.ThreadPoolExecutor(self.jobs) as pool:
+      futures = {pool.submit(self.get, path): path for path in _paths}
+      for future in concurrent.futures.as_completed(futures):
+        try:
+          yield (futures[future], future.result())
+        except (OSError, ValueError) as e:
+          print('WARNING: request %s failed: %s' % (futures[future], e))
+
+
+class Source:
+  # one api: its default base url, the download file and how to bring that
+  # file up to date between two dates (YYYY-MM-DD-HH-MM)
+  baseURL = ''
+
+  def filename(self):
+    raise NotImplementedError
+
+  def update(self, _fetcher, _filename, _start, _end):
+    # -> number of requests made
+    raise NotImplementedError
+
+
+class CryptocompareSource(Source):
+  # daily prices of one currency in several others, one request per day,
+  # appended as "%Y-%m-%d %H:%M,{json}" lines (read by ablib.marketdata)
+  baseURL = 'https://min-api.cryptocompare.com'
+  DAY = 24 * 60
+
+  def __init__(self, _fromCurrency, _toCurrencies):
+    self.fromCurrency = _fromCurrency
+    self.toCurrencies = _toCurrencies
+
+  def filename(self):
+    return self.fromCurrency + ''.join(self.toCurrencies) + '.csjson'
+
+  def fetched(self, _filename):
+    # days already in the file (whatever the time of day), error responses
+    # are fetched again
+    days = set()
+    if os.path.exists(_filename):
+      with open(_filename) as f:
+        for line in f:
+          (timestr, sep, response) = line.partition(',')
+          if sep and not response.startswith('{"Response"'):
+            days.add(dateToMinutes(timestr.replace(' ', '-').replace(':', '-')) // self.DAY)
+    return days
+
+  def update(self, _fetcher, _filename, _start, _end):
+    # prices at noon of each day
+    first = dateToMinutes(_start) // self.DAY * self.DAY + self.DAY // 2
+    fetched = self.fetched(_filename)
+    days = [m for m in range(first, dateToMinutes(_end) + 1, self.DAY) if m // self.DAY not in fetched]
+    paths = {}
+    for m in days:
+      query = urllib.parse.urlencode({'fsym': self.fromCurrency, 'tsyms': ','.join(self.toCurrencies), 'ts': m * 60})
+      paths['/data/pricehistorical?' + query] = m
+    with open(_filename, 'a') as f:
+      for (path, data) in _fetcher.getMany(sorted(paths, key=paths.get)):
+        response = data.decode().strip()
+        if response.startswith('{"Response"'):
+          print('WARNING: error response for %s: %s' % (path, response))
+          continue
+        date = minutesToDate(paths[path])
+        f.write('%s %s:%s,%s\n' % (date[:10], date[11:13], date[14:16], response))
+    return len(days)
+
+
+class CryptowatSource(Source):
+  # ohlc candles of one market in several periods, kept as a single json
+  # document (read by ablib.marketdata); only candles after the last one held
+  # for every period are requested, and merged in
+  baseURL = 'https://api.cryptowat.ch'
+  periods = [3600, 21600, 43200, 86400]
+
+  def __init__(self, _market, _fromCurrency, _toCurrency):
+    self.market = _market
+    self.fromCurrency = _fromCurrency
+    self.toCurrency = _toCurrency
+
+  def filename(self):
+    return 'cryptowat.%s%s%s.json' % (self.market, self.fromCurrency, self.toCurrency)
+
+  def update(self, _fetcher, _filename, _start, _end):
+    candles = {p: {} for p in self.periods}
+    if os.path.exists(_filename):
+      result = json.load(open(_filename))['result']
+      for (period, rows) in result.items():
+        candles.setdefault(int(period), {}).update((row[0], row) for row in rows)
+    after = dateToMinutes(_start) * 60
+    if all(len(c) > 0 for c in candles.values()):
+      after = max(after, min(max(c.keys()) for c in candles.values()))
+    path = '/markets/%s/%s%s/ohlc?after=%d&periods=%s' % (self.market, self.fromCurrency.lower(), self.toCurrency.lower(), after, ','.join(map(str, self.periods)))
+    for (period, rows) in json.loads(_fetcher.get(path).decode())['result'].items():
+      candles.setdefault(int(period), {}).update((row[0], row) for row in rows)
+    end = dateToMinutes(_end) * 60
+    result = {str(p): [c[t] for t in sorted(c) if t <= end] for (p, c) in sorted(candles.items())}
+    with open(_filename, 'w') as f:
+      json.dump({'result': result}, f)
+    return 1
+
+
+class KrakenSource(Source):
+  # hourly closes of one kraken pair, written straight out as a conversion
+  # file; kraken pages its answers, so these requests are sequential
+  baseURL = 'https://api.kraken.com'
+
+  def __init__(self, _pair, _fromCurrency, _toCurrency):
+    self.pair = _pair
+    self.fromCurrency = _fromCurrency
+    self.toCurrency = _toCurrency
+
+  def filename(self):
+    return 'kraken%s%s.csv' % (self.fromCurrency, self.toCurrency)
+
+  def update(self, _fetcher, _filename, _start, _end):
+    rates = {}
+    if os.path.exists(_filename):
+      with open(_filename) as f:
+        f.readline()
+        for line in f:
+          (date, rate) = line.split(',')
+          rates[dateToMinutes(date.strip())] = float(rate)
+    since = max([dateToMinutes(_start)] + list(rates.keys())) * 60
+    end = dateToMinutes(_end)
+    requests = 0
+    while since < end * 60:
+      requests += 1
+      response = json.loads(_fetcher.get('/0/public/OHLC?pair=%s&interval=60&since=%d' % (self.pair, since)).decode())
+      if len(response.get('error', [])) > 0:
+        exit('ERROR: kraken: %s' % ', '.join(response['error']))
+      # [time, open, high, low, close, vwap, volume, count]
+      rows = response['result'][self.pair]
+      for row in rows:
+        if row[0] // 60 <= end:
+          rates[row[0] // 60] = float(row[4])
+      if len(rows) == 0 or response['result']['last'] <= since:
+        break
+      since = response['result']['last']
+    with open(_filename, 'w') as f:
+      f.write('%s, %s\n' % (self.fromCurrency, self.toCurrency))
+      f.write(''.join('%s, %s\n' % (minutesToDate(m), rates[m]) for m in sorted(rates)))
+    return requests
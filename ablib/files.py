@@ -0,0 +1,85 @@
+#
+# Input files: gzip, xz and zstandard compressed ledgers and market dumps are
+# decompressed on the fly, and large plain files are read through mmap
+#
+
+import os
+import io
+import gzip
+import lzma
+import mmap
+
+try:
+  from compression import zstd # python 3.14+
+except ImportError:
+  try:
+    import zstandard as zstd
+  except ImportError:
+    zstd = None # no .zst input support
+
+
+def openZstd(_filename, _mode='rb'):
+  if zstd is None:
+    exit('ERROR: reading %s needs the zstandard package (or python 3.14)' % _filename)
+  if zstd.__name__ == 'zstandard':
+    return zstd.ZstdDecompressor().stream_reader(open(_filename, 'rb'), read_across_frames=True, closefd=True)
+  return zstd.open(_filename, _mode)
+
+# file suffix -> function opening it as a binary stream of the decompressed data
+COMPRESSION = {
+  '.gz': gzip.open,
+  '.xz': lzma.open,
+  '.zst': openZstd
+}
+
+MAP_THRESHOLD = 1 << 24 # plain files from this size are read through mmap
+MAP_CHUNK = 1 << 24 # bytes decoded at a time from a mapped file
+
+def compressionOf(_filename):
+  suffix = os.path.splitext(_filename)[1]
+  return suffix if suffix in COMPRESSION else ''
+
+def stripCompression(_filename):
+  # e.g. trades.raw.gz -> trades.raw, for formats told by the file extension
+  suffix = compressionOf(_filename)
+  return _filename[:-len(suffix)] if suffix else _filename
+
+def readData(_filename):
+  # whole (decompressed) contents as bytes
+  suffix = compressionOf(_filename)
+  opener = COMPRESSION[suffix] if suffix else open
+  with opener(_filename, 'rb') as f:
+    return f.read()
+
+def mappedLines(_f):
+  # lines of a plain file through mmap, decoded a chunk of whole lines at a time
+  with mmap.mmap(_f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+    (start, size) = (0, len(m))
+    while start < size:
+      end = size
+      if start + MAP_CHUNK < size:
+        end = m.rfind(b'\n', start, start + MAP_CHUNK) + 1
+        if end <= start: # line longer than a chunk
+          end = m.find(b'\n', start + MAP_CHUNK) + 1 or size
+      yield from io.StringIO(m[start:end].decode(), newline=None)
+      start = end
+
+def openText(_filename):
+  # (possibly compressed) file as a text stream, with universal newlines
+  suffix = compressionOf(_filename)
+  if suffix:
+    return io.TextIOWrapper(COMPRESSION[suffix](_filename, 'rb'), newline=None)
+  return open(_filename, newline=None)
+
+def openLines(_filename):
+  # iterator over the text lines of a (possibly compressed) file, with
+  # universal newlines as for open()
+  if compressionOf(_filename):
+    with openText(_filename) as f:
+      yield from f
+    return
+  with open(_filename, 'rb') as f:
+    if os.fstat(f.fileno()).st_size < MAP_THRESHOLD:
+      yield from io.TextIOWrapper(f, newline=None)
+    else:
+      yield from mappedLines(f)
@@ -0,0 +1,651 @@
+#
+# The calculation itself: reads bootstrap account states, conversion tables
+# and ledger exports, values and dispatches every transaction to its accounts,
+# processes them and reports the totals for the period
+#
+
+import sys
+import os
+import glob
+import re
+import math
+import time
+import copy
+import argparse
+import multiprocessing
+
+from .symbols import symbols
+from .profile import Profiler
+from .util import extractCSVs
+from .converter import CurrencyConverter
+from .parsers import parseFile, packParsed, unpackParsed
+from .cache import LedgerCache
+from .files import readData
+from .accounts import Account, TX, FixedPointAccount, FixedPointTX, BaseAccount, FixedPointBaseAccount, createTXid
+from .output import writeMergedLedger
+from .transfers import transferHandler
+from .dedup import FingerprintSet, rowFingerprints
+from .snapshots import saveSnapshot, loadSnapshot, IncrementalState
+from .series import STEPS, portfolioSeries, writeSeries
+from .validate import validateInputs, parseCollecting
+from .coverage import hourOf
+from .dates import dayOrdinal
+
+# TODO: make this list a command line input or something
+ACCOUNT_PREFIXES = ['poloniex', 'kraken', 'bitstamp', 'gatecoin', 'localbitcoins', 'bitfinex', 'bittrex', 'cryptsy', 'btcsx', 'currencyfair', 'hsbc']
+
+def accountPrefixOf(_filename):
+  # e.g. ledgers/kraken.2016.csv -> 'kraken'
+  accountPrefix = re.sub('^.*/','', re.sub('\..*$', '', _filename))
+  if accountPrefix not in ACCOUNT_PREFIXES:
+    accountPrefix = '' # computer says no
+  return accountPrefix
+
+
+def lineRanges(_lines):
+  # e.g. [3, 4, 5, 9] -> '3-5, 9'
+  ranges = []
+  for ln in sorted(set(_lines)):
+    if len(ranges) > 0 and ranges[-1][1] == ln - 1:
+      ranges[-1][1] = ln
+    else:
+      ranges.append([ln, ln])
+  return ', '.join(('%d-%d' % (a, b), '%d' % a)[a == b] for (a, b) in ranges)
+
+
+parseWorkerState = None
+
+def initParseWorker(_converter, _base):
+  global parseWorkerState
+  parseWorkerState = (_converter, _base) # inherited through fork, not pickled
+
+def parseWorker(_filename):
+  # parse one export in a worker process; the rows go back packed, and errors
+  # as their message so that the parent can stop the run
+  (converter, base) = parseWorkerState
+  (wall, cpu) = (time.perf_counter(), time.process_time())
+  try:
+    (parsed, usesConversions) = parseFile(readData(_filename), converter, base, _filename)
+  except SystemExit as e:
+    return (None, False, str(e.code), 0.0, 0.0)
+  return (packParsed(parsed), usesConversions, None, time.perf_counter() - wall, time.process_time() - cpu)
+
+
+class Ledger:
+  # One calculation with its own options, conversion tables, parse cache and
+  # profiler, so that several can be run (and rerun) in one process:
+  #   ledger = Ledger(input='ledgers/*.csv', start='2015-04-06-00-00')
+  #   accounts = ledger.run()
+  # Options are named as abledger.py's command line arguments.
+  DEFAULTS = {
+    'input': 'ledgers/*.csv',
+    'base': 'GBP',
+    'conversion': 'conversions/*.csv',
+    'start': '1000-01-01-00-00',
+    'end': '2099-12-31-23-59',
+    'accounts': '.accounts',
+    'cache': 'cache',
+    'resident': False, # also keep parsed ledgers in memory between runs
+    'output': 'output',
+    'output_format': 'formula',
+    'profile': '',
+    'snapshots': 'snapshots',
+    'save_snapshot': False,
+    'resume': False,
+    'incremental': False,
+    'merged': False,
+    'net_base': False, # leave out the cancelling base entries of non-base trades
+    'dedup': True, # leave out rows repeated in overlapping exports
+    'dedup_content': False, # also match rows without exchange ids on content
+    'series': '', # 'hour' or 'day' to write the portfolio valuation series
+    'fixed_point': False, # process accounts on scaled integers
+    'bb_days': 30, # "bed and breakfast" matching window
+    'priorities': ['BTC', 'EUR', 'USD', 'CHF'], # valuation currency order after the base
+    'exclude': [], # account prefixes or file names of inputs to leave out
+    'jobs': 0 # parse worker processes, 0 for one per core
+  }
+
+  def __init__(self, **_options):
+    unknown = [k for k in _options if k not in self.DEFAULTS]
+    if len(unknown) > 0:
+      raise TypeError('unknown Ledger option(s): %s' % ', '.join(unknown))
+    self.options = argparse.Namespace(**dict(self.DEFAULTS, **_options))
+    self.configure()
+    self.profiler = Profiler(self.options.profile)
+    self.converter = CurrencyConverter(self.profiler)
+    self.cache = LedgerCache(self.options.cache, self.conversionFiles, self.base, self.options.resident)
+    self.currencyPriorities = {}
+    self.resumeDate = None
+    self.loaded = False
+    self.parsed = None # see preload
+    self.accounts = None # results of the last run
+    self.transfers = None
+
+  def configure(self):
+    # settings derived from the options
+    if self.options.fixed_point and (self.options.incremental or self.options.save_snapshot or self.options.resume):
+      sys.exit('ERROR: fixed point mode does not support snapshots or incremental runs')
+    if self.options.series and self.options.incremental:
+      sys.exit('ERROR: the valuation series needs full processing, not an incremental run')
+    if self.options.series not in ('',) + tuple(STEPS):
+      sys.exit('ERROR: unknown series step "%s"' % self.options.series)
+    for date in (self.options.start, self.options.end):
+      try:
+        dayOrdinal(date)
+      except ValueError:
+        sys.exit('ERROR: invalid date "%s"' % date)
+    (self.accountClass, self.txClass) = ((Account, TX), (FixedPointAccount, FixedPointTX))[self.options.fixed_point]
+    # base currency accounts need no pooling
+    self.baseAccountClass = (BaseAccount, FixedPointBaseAccount)[self.options.fixed_point]
+    self.findFiles()
+    self.base = self.options.base
+    self.baseId = symbols.id(self.base)
+
+  def findFiles(self):
+    excluded = lambda f: accountPrefixOf(f) in self.options.exclude or os.path.basename(f) in self.options.exclude
+    self.inputs = [f for f in glob.glob(self.options.input) if not excluded(f)]
+    if len(self.inputs) == 0:
+      sys.exit('need input csv(s)')
+    self.conversionFiles = glob.glob(self.options.conversion)
+    self.accountsFiles = glob.glob(self.options.accounts)
+
+  def newAccount(self, _id, _currId):
+    accountClass = (self.accountClass, self.baseAccountClass)[_currId == self.baseId]
+    a = accountClass(_id, _currId, self.baseId, self.profiler, self.options.output_format, os.path.join(self.options.output, ''))
+    a.bbDays = self.options.bb_days
+    return a
+
+  def loadConversions(self, _filenames):
+    for filename in _filenames:
+      with self.profiler.stage('conversions ' + filename) as stage:
+        stage.rows = self.converter.loadPairData(filename)
+
+  def setCurrencyPriorities(self):
+    # the base first, then the priorities option in order, then the rest
+    priorities = dict({self.base: 0}, **{c: -10 * (n + 1) for (n, c) in enumerate(self.options.priorities)})
+    self.currencyPriorities = {symbols.id(c): p for (c, p) in priorities.items()}
+    plevel = min(list(self.currencyPriorities.values())) - 10
+    for currency in self.converter.currencies():
+      if currency not in self.currencyPriorities:
+        self.currencyPriorities[currency] = plevel
+
+  def load(self):
+    self.loadConversions(self.conversionFiles)
+    self.setCurrencyPriorities()
+    self.loaded = True
+
+  def run(self):
+    if not self.loaded:
+      self.load()
+    accounts = self.bootstrapAccounts()
+    transfers = transferHandler()
+    self.ingest(accounts, transfers)
+    self.report(accounts, transfers)
+    (self.accounts, self.transfers) = (accounts, transfers)
+    return accounts
+
+  def validate(self):
+    # -> every problem with the inputs as LedgerErrors (see validate.py),
+    # without running the calculation
+    if not self.loaded:
+      self.load()
+    with self.profiler.stage('validation') as stage:
+      errors = validateInputs(self, self.options.jobs)
+      stage.rows = len(errors)
+    return errors
+
+  def checkCoverage(self):
+    # -> ({currency: hours (see coverage.hourOf)} the inputs need a rate to
+    # the base for and the conversion tables lack, LedgerErrors of the rows
+    # that fail to parse), all at once. Inputs are read from the cache where
+    # possible, otherwise as --validate reads them, so that a file with a bad
+    # row is still checked; such a file is not cached.
+    if not self.loaded:
+      self.load()
+    needs = {}
+    errors = []
+    if self.parsed is not None:
+      inputs = [(filename, parsed) for (filename, parsed, fromCache) in self.parsed]
+    else:
+      inputs = []
+      for filename in self.inputs:
+        with self.profiler.stage('parse ' + filename) as stage:
+          data = readData(filename)
+          (cachekey, parsed) = (None, None)
+          if self.cache.enabled():
+            cachekey = self.cache.key(data, os.path.basename(filename))
+            parsed = self.cache.load(cachekey)
+          if parsed is None:
+            (parsed, fileErrors, usesConversions) = parseCollecting(self, filename, data)
+            errors += fileErrors
+            if cachekey is not None and len(fileErrors) == 0:
+              self.cache.save(cachekey, parsed, usesConversions)
+          stage.rows = len(parsed)
+        inputs.append((filename, parsed))
+    for (filename, parsed) in inputs:
+      with self.profiler.stage('coverage') as stage:
+        for (ln, tx) in parsed:
+          if tx.date > self.options.end: continue
+          (currency, amount, slot) = self.valuationNeeds(tx)[1][0]
+          if currency != self.baseId:
+            needs.setdefault(currency, set()).add(hourOf(tx.date))
+        stage.rows = len(parsed)
+    missing = self.converter.missingRates(needs, self.baseId)
+    return ({symbols.name(c): hours for (c, hours) in missing.items()}, errors)
+
+  def preload(self):
+    # parse every input up front and keep the rows, so that runs and
+    # variants of this ledger share them
+    if not self.loaded:
+      self.load()
+    self.parsed = list(self.parseInputs())
+
+  def variant(self, **_overrides):
+    # a copy with some options changed that shares the conversion tables and
+    # any preloaded inputs; results go to its own accounts and transfers
+    unknown = [k for k in _overrides if k not in self.DEFAULTS]
+    if len(unknown) > 0:
+      raise TypeError('unknown Ledger option(s): %s' % ', '.join(unknown))
+    ledger = copy.copy(self)
+    ledger.options = argparse.Namespace(**dict(vars(self.options), **_overrides))
+    ledger.configure()
+    if ledger.base != self.base:
+      # parsing depends on the base currency, so files are parsed again
+      ledger.cache = LedgerCache(ledger.options.cache, ledger.conversionFiles, ledger.base)
+      ledger.parsed = None
+    ledger.setCurrencyPriorities()
+    (ledger.accounts, ledger.transfers) = (None, None)
+    return ledger
+
+  def evaluate(self):
+    # process without writing any output; returns the totals as for report
+    if not self.loaded:
+      self.load()
+    accounts = self.bootstrapAccounts()
+    transfers = transferHandler()
+    self.ingest(accounts, transfers)
+    self.processAccounts(accounts, False)
+    (self.accounts, self.transfers) = (accounts, transfers)
+    return self.totals(accounts)
+
+  def reload(self, _changed):
+    # rerun after the files in _changed were modified, added or removed; only
+    # changed conversion tables are read again, and with the resident cache
+    # only changed ledger files are parsed again
+    conversionFiles = glob.glob(self.options.conversion)
+    if any(f not in conversionFiles for f in self.conversionFiles):
+      self.converter = CurrencyConverter(self.profiler) # a pair may have gone
+      self.loadConversions(conversionFiles)
+    else:
+      self.loadConversions([f for f in conversionFiles if f in _changed])
+    self.findFiles()
+    self.parsed = None
+    self.cache.setConversionFiles(self.conversionFiles)
+    self.setCurrencyPriorities()
+    accounts = self.run()
+    self.cache.prune()
+    return accounts
+
+  def account(self, _name):
+    # account of the last run by name or key, e.g. 'poloniexBTC' or 'BTC'
+    for (key, a) in self.accounts.items():
+      if symbols.name(key) == _name or a.name == _name:
+        return a
+    return None
+
+  def writeProfile(self):
+    self.profiler.write(vars(self.options))
+
+  def bootstrapAccounts(self):
+    # read pre-ledger state and initialize
+    self.resumeDate = None
+    accounts = {self.baseId: self.newAccount(self.baseId, self.baseId)}
+
+    if self.options.resume:
+      snapshot = loadSnapshot(self.options.start, self.options.snapshots, self.base)
+      if snapshot is None:
+        print('WARNING: no snapshot before %s in %s, processing all history' % (self.options.start, self.options.snapshots))
+      else:
+        self.resumeDate = snapshot['date']
+        for state in snapshot['accounts']:
+          key = symbols.id(state['key'])
+          if key not in accounts:
+            accounts[key] = self.newAccount(symbols.id(state['name']), symbols.id(state['currency']))
+          accounts[key].restore(state, self.resumeDate)
+
+    with self.profiler.stage('accounts bootstrap') as stage:
+      for filename in (self.accountsFiles, [])[self.resumeDate is not None]: # snapshots include the bootstrap state
+        print('Reading bootstrap account data from %s ...' % (filename))
+        f = open(filename)
+        i = 0
+        for line in f:
+          i += 1
+          accountInfo = extractCSVs(line, 5, i)
+          if len(accountInfo) > 0:
+            if accountInfo[3] == self.base:
+              name = accountInfo[0]
+              currency = accountInfo[1]
+              amount = float(accountInfo[2])
+              value = float(accountInfo[4])
+              currencyId = symbols.id(currency)
+              # create account
+              if currencyId not in accounts:
+                accounts[currencyId] = self.newAccount(symbols.id(name), currencyId)
+              # add to ledger(s)
+              id_ = createTXid(currency, self.base, value, self.options.start, filename)
+              accounts[currencyId].addTX(self.txClass(amount, value, self.options.start, id_))
+              stage.rows += 1
+              if currencyId != self.baseId:
+                accounts[self.baseId].addTX(self.txClass(-value, -value, self.options.start, id_))
+              # TODO: custom accounts init date
+            else:
+              exit('ERROR: Invalid base currency for account on line %d' % i)
+
+    return accounts
+
+  def parseInputs(self):
+    # yields (filename, parsed rows, whether they came from the cache) in
+    # input order; each whole file is parsed before its valuations are
+    # resolved in bulk, and files missing from the cache are parsed in forked
+    # worker processes when there are several of them
+    files = []
+    for filename in self.inputs:
+      with self.profiler.stage('parse ' + filename) as stage:
+        data = readData(filename)
+
+        (cachekey, parsed) = (None, None)
+        if self.cache.enabled():
+          cachekey = self.cache.key(data, os.path.basename(filename))
+          parsed = self.cache.load(cachekey)
+          if parsed is not None:
+            self.profiler.count('cacheHits')
+            stage.rows = len(parsed)
+          else:
+            self.profiler.count('cacheMisses')
+      files.append((filename, data, cachekey, parsed))
+
+    misses = [filename for (filename, data, cachekey, parsed) in files if parsed is None]
+    workers = min(self.options.jobs or os.cpu_count() or 1, len(misses))
+    (pool, results) = (None, {})
+    if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+      pool = multiprocessing.get_context('fork').Pool(workers, initParseWorker, (self.converter, self.base))
+      for filename in misses:
+        results[filename] = pool.apply_async(parseWorker, (filename,))
+
+    try:
+      for (filename, data, cachekey, parsed) in files:
+        fromCache = parsed is not None
+        packed = None
+        if filename in results:
+          (packed, usesConversions, error, wall, cpu) = results[filename].get()
+          if error is not None:
+            exit(error)
+          parsed = unpackParsed(packed)
+          self.profiler.record('parse ' + filename, wall, cpu, len(parsed))
+        elif parsed is None:
+          with self.profiler.stage('parse ' + filename) as stage:
+            (parsed, usesConversions) = parseFile(data, self.converter, self.base, filename)
+            stage.rows = len(parsed)
+        if not fromCache and cachekey is not None:
+          self.cache.save(cachekey, parsed, usesConversions, packed)
+        yield (filename, parsed, fromCache)
+    finally:
+      if pool is not None:
+        pool.terminate()
+
+  def ingest(self, accounts, transfers):
+    inputs = self.parseInputs()
+    if self.parsed is not None:
+      inputs = [p for p in self.parsed if p[0] in self.inputs]
+    fingerprints = FingerprintSet()
+    for (filename, parsed, fromCache) in inputs:
+      print("DEBUG: reading ledger file %s" % filename)
+
+      accountPrefix = accountPrefixOf(filename)
+
+      print("DEBUG: using account prefix \"%s\" derived from filename" % (accountPrefix))
+      accountPrefixId = symbols.id(accountPrefix)
+
+      if fromCache:
+        print("DEBUG: using cached parse of %s" % filename)
+
+      if self.options.dedup:
+        with self.profiler.stage('deduplication') as stage:
+          parsed = self.dropDuplicates(filename, accountPrefix, parsed, fingerprints)
+          stage.rows = len(parsed)
+
+      inrange = []
+      for (ln, tx) in parsed:
+        if tx.date > self.options.end: continue
+        if self.resumeDate is not None and tx.date <= self.resumeDate: continue
+
+        if tx.amount1 * tx.amount2 > 0:
+          exit('ERROR: Invalid fund exchange on %s line %d: %s %f <> %s %f' % (filename, ln, symbols.name(tx.curr1), tx.amount1, symbols.name(tx.curr2), tx.amount2) )
+
+        inrange.append((ln, tx))
+      parsed = inrange
+
+      with self.profiler.stage('valuation') as stage:
+        # collect pending valuations, one batch per (currency, base) pair
+        pending = {}
+        priorities = []
+        for (n, (ln, tx)) in enumerate(parsed):
+          (i, needs) = self.valuationNeeds(tx)
+          priorities.append(i)
+
+          for (currency, amount, slot) in needs:
+            if currency == self.baseId: continue
+            if currency not in pending:
+              pending[currency] = ([], [], [])
+            (dates, amounts, keys) = pending[currency]
+            dates.append(tx.date)
+            amounts.append(amount)
+            keys.append((n, slot))
+
+        valuations = {}
+        for currency in pending:
+          (dates, amounts, keys) = pending[currency]
+          valuations.update(zip(keys, self.converter.convertMany(dates, currency, self.baseId, amounts)))
+        stage.rows = len(parsed)
+
+      for (n, (ln, tx)) in enumerate(parsed):
+        # Process entry
+        account1 = tx.account1
+        account2 = tx.account2
+
+        value1 = False;
+        value2 = False;
+
+        # determine value
+        if tx.curr1 == tx.curr2:
+          if tx.curr1 == self.baseId:
+            v1 = tx.amount1
+            v2 = tx.amount2
+          elif valuations[(n, 0)] is not None:
+            v1 = valuations[(n, 0)]
+            v2 = valuations[(n, 1)]
+          else:
+            exit('ERROR: Currency conversions for %s is not available on %s in %s at line %d' % (symbols.name(tx.curr1), tx.date, filename, ln))
+
+          if tx.curr1 != self.baseId and abs(v1) != abs(v2):
+            print('WARNING: mismatched transaction values: %f vs %f on %s (line %d)' % (v1, v2, tx.date, ln))
+            if v1 == 0 or v2 == 0: print('SUGGESTION: set the currency of the zero value to %s' % self.base)
+          value1 = math.copysign(max(abs(v1), abs(v2)), tx.amount1)
+          value2 = -value1
+        else:
+          i = priorities[n]
+          tcs = (tx.curr1, tx.curr2)
+          tas = (tx.amount1, tx.amount2)
+
+          if tcs[i - 1] == self.baseId:
+            v = tas[i - 1]
+          elif valuations[(n, 0)] is not None:
+            v = valuations[(n, 0)]
+          else:
+            exit('ERROR: Currency conversions for priority currency %s is not available on %s in %s at line %d' % (symbols.name(tcs[i - 1]), tx.date, filename, ln))
+
+          value1 = math.copysign(v, tas[0])
+          value2 = -value1
+
+        # ignore dust transactions
+        if abs(value1) < 0.001 and abs(tx.amount1) < 1e-8 and abs(tx.amount2) < 1e-8:
+          continue
+
+        # add account prefix
+        if not tx.isTransfer and accountPrefix != '':
+          account1 = symbols.join(accountPrefixId, account1)
+          account2 = symbols.join(accountPrefixId, account2)
+
+        id_ = createTXid(symbols.name(account1), symbols.name(account2), value1, tx.date, filename + str(ln))
+
+        # skip transfer seen from the other side
+        if tx.isTransfer:
+          with self.profiler.stage('transfer matching') as stage:
+            transfers.add(tx, id_, filename)
+            stage.rows = 1
+          if transfers.isMatched(id_):
+            #mid = transfers.matchIdOf(id_)
+            #print("DEBUG: ignoring transfer %s, matched to %s, (line %d)" % (transfers.strOf(id_), transfers.strOf(mid), ln))
+            continue
+
+        if account1 not in accounts: 
+          accounts[account1] = self.newAccount(account1, tx.curr1)
+          print("DEBUG: creating account for %s" % accounts[account1].name)
+        if account2 not in accounts: 
+          accounts[account2] = self.newAccount(account2, tx.curr2)
+          print("DEBUG: creating account for %s" % accounts[account2].name)
+
+        if (tx.curr1 == self.baseId and tx.amount1 != value1) or (tx.curr2 == self.baseId and tx.amount2 != value2):
+          print("DEBUG: adding cost asymmetric tx on %s: [%s :: %f %s :: %f %s] -> [%s :: %f %s :: %f %s]" % (tx.date, symbols.name(account1), tx.amount1, symbols.name(tx.curr1), value1, self.base, symbols.name(account2), tx.amount2, symbols.name(tx.curr2), value2, self.base))
+
+        #print("DEBUG: {%s, %f, %f} & {%s, %f, %f}" % (account1, amount1, value1, account2, amount2, value2))
+        accounts[account1].addTX(self.txClass(tx.amount1, value1, tx.date, id_))
+        accounts[account2].addTX(self.txClass(tx.amount2, value2, tx.date, id_))
+
+        # a trade between two other currencies puts its value through the base
+        # account both ways; the two entries are written by default, and
+        # --net-base leaves them out as they cancel
+        if tx.curr1 != self.baseId and tx.curr2 != self.baseId and not self.options.net_base:
+          #print("DEBUG: {%s, %f, %f} & {%s, %f, %f}" % (self.base, -value1, -value1, self.base, -value2, -value2))
+          accounts[self.baseId].addTX(self.txClass(-value1, -value1, tx.date, id_))
+          accounts[self.baseId].addTX(self.txClass(-value2, -value2, tx.date, id_))
+
+  def valuationNeeds(self, tx):
+    # -> (side, 1 or 2, whose currency values the tx, [(currency, amount,
+    # slot)] to convert to the base)
+    if tx.curr1 == tx.curr2:
+      return (1, [(tx.curr1, tx.amount1, 0), (tx.curr2, tx.amount2, 1)])
+    # determine which currency has higher priority
+    if tx.curr1 not in self.currencyPriorities and tx.curr2 not in self.currencyPriorities: i = 1
+    elif tx.curr1 not in self.currencyPriorities: i = 2
+    elif tx.curr2 not in self.currencyPriorities: i = 1
+    else: i = (1, 2)[self.currencyPriorities[tx.curr1] < self.currencyPriorities[tx.curr2]]
+    return (i, [((tx.curr1, tx.curr2)[i - 1], (tx.amount1, tx.amount2)[i - 1], 0)])
+
+  def dropDuplicates(self, filename, prefix, parsed, fingerprints):
+    # rows already read from another export of the same exchange are
+    # reported and left out
+    keys = rowFingerprints(prefix, parsed, self.options.dedup_content)
+    kept = []
+    duplicates = []
+    for (key, row) in zip(keys, parsed):
+      if key is not None and key in fingerprints:
+        duplicates.append(row[0])
+        print('WARNING: line %d of %s already read from another file, left out: %s' % (row[0], filename, row[1]))
+      else:
+        kept.append(row)
+    fingerprints.update(keys)
+    if len(duplicates) > 0:
+      self.profiler.count('duplicateRows', len(duplicates))
+      print('WARNING: %d row(s) of %s already read from another file, left out (lines %s)' % (len(duplicates), filename, lineRanges(duplicates)))
+    return kept
+
+  def processAccounts(self, accounts, _write=True):
+    incremental = None
+    if self.options.incremental:
+      processing = {k: getattr(self.options, k) for k in ('bb_days', 'fixed_point', 'net_base', 'priorities')}
+      incremental = IncrementalState(os.path.join(self.options.snapshots, 'incremental'), self.base, self.options.output_format, self.resumeDate, processing)
+
+    for curr in accounts.keys():
+      a = accounts[curr]
+      (mode, fromDate) = ('full', '')
+      if incremental:
+        (mode, fromDate) = incremental.prepare(curr, a)
+      if mode == 'reuse':
+        print("DEBUG: inputs for %s unchanged, reusing previous results" % a.name)
+      else:
+        if mode == 'replay':
+          print("DEBUG: replaying %s from %s" % (a.name, fromDate))
+        with self.profiler.stage('process ' + a.name) as stage:
+          a.process(fromDate, self.options.incremental, self.options.save_snapshot or self.options.incremental)
+          stage.rows = len(a.ledger)
+      if _write and (mode != 'reuse' or not os.path.exists(a.output.filename)):
+        with self.profiler.stage('output') as stage:
+          a.write()
+          stage.rows = len(a.ledger)
+
+    if incremental:
+      incremental.save(accounts)
+
+  def totals(self, accounts):
+    # figures for the period, per account (in accounts order) and summed
+    rows = []
+    total = {'cost': 0.0, 'initialCost': 0.0, 'profit': 0.0, 'proceeds': 0.0, 'chargeable': 0.0, 'disposals': 0}
+    for curr in accounts.keys():
+      a = accounts[curr]
+      (proceeds, num) = a.proceedsBetween(self.options.start, self.options.end)
+      row = {
+        'key': symbols.name(curr),
+        'name': a.name,
+        'balance': a.balanceAt(self.options.end),
+        'cost': a.costAt(self.options.end),
+        'initialCost': a.costAt(self.options.start),
+        'profit': a.profitBetween(self.options.start, self.options.end),
+        'proceeds': proceeds,
+        'chargeable': a.chargeableBetween(self.options.start, self.options.end),
+        'disposals': num
+      }
+      for k in total:
+        total[k] += row[k]
+      rows.append(row)
+    return (rows, total)
+
+  def report(self, accounts, transfers):
+    self.processAccounts(accounts)
+    (rows, total) = self.totals(accounts)
+
+    print('\n')
+
+    ml = 0
+    for row in rows:
+      l = len(row['key'])
+      if l > ml: ml = l
+    ml += 1
+
+    print((" " * (ml - 7)) + "Account, \tBalance, \tCost, \t\tProfit, \tProceeds, \tChargeable")
+    for row in rows:
+      print('%s%s,\t%f,\t%f,\t%f,\t%f,\t%f' % (" " * (ml - len(row['key'])), row['name'], row['balance'], row['cost'], row['profit'], row['proceeds'], row['chargeable']))
+
+    print('\n')
+
+    print("Final:\n  Cost = %f %s\n  Profit = %f %s\n  Proceeds = %f %s\n  Chargeable = %f %s\n  Number of disposals = %i\n" % (total['cost'], self.base, total['profit'], self.base, total['proceeds'], self.base, total['chargeable'], self.base, total['disposals']) )
+
+    error = abs(total['cost'] - total['initialCost'])
+    print("Check:\n  %f (%s)\n" % (error, ("FAILED", "OK")[error < 0.01]) )
+
+    if self.options.save_snapshot:
+      saveSnapshot(accounts, self.options.end, self.options.snapshots, self.base)
+
+    if self.options.merged:
+      with self.profiler.stage('merged output'):
+        writeMergedLedger(accounts.values(), os.path.join(self.options.output, 'cat_sorted.csv'), self.base)
+
+    if self.options.series:
+      with self.profiler.stage('series') as stage:
+        series = portfolioSeries(list(accounts.values()), self.converter, self.baseId, self.options.start, self.options.end, self.options.series)
+        writeSeries(os.path.join(self.options.output, 'series.abls'), accounts.values(), self.base, self.options.series, series)
+        stage.rows = len(series[0])
+
+    transferdatafile = open(os.path.join(self.options.output, 'transfers.txt'), 'w')
+    transferdatafile.write(str(transfers))
+    transferdatafile.close()
@@ -0,0 +1,95 @@
+#
+# Conversion rate series from market data api dumps, read as a stream:
+#   cryptocompare: one "%Y-%m-%d %H:%M,{json}" line per request, e.g.
+#     2017-01-25 18:00,{"ETC":{"BTC":0.001428,"USD":1.28,"EUR":1.2}}
+#     with any number of to-currencies
+#   cryptowat:     a single ohlc json document per market, e.g.
+#     {"result":{"3600":[[CloseTime, Open, High, Low, Close, Volume], ...], ...}}
+# Series are (from currency, to currency) -> (dates, rates) with dates as
+# minutes since epoch in ascending order, ready for writeConversionCSV or
+# CurrencyConverter.addSeries
+#
+
+import re
+import json
+import time
+import array
+
+from .util import minutesToDate
+from .files import openText, openLines
+
+READ_CHUNK = 1 << 20
+
+def sortedSeries(_points):
+  # [(minutes, rate)] -> (dates, rates) columns ordered by date
+  dates = array.array('q')
+  rates = array.array('d')
+  for (minutes, rate) in sorted(_points):
+    dates.append(minutes)
+    rates.append(rate)
+  return (dates, rates)
+
+def cryptocompareSeries(_filename):
+  # lines may come in any order (downloads go back in time, fetch.py appends
+  # newer days); a later line for the same time takes precedence, and zero
+  # prices (before a currency was listed) are left out
+  points = {}
+  zeros = {}
+  ln = 0
+  for line in openLines(_filename):
+    ln += 1
+    (timestr, sep, response) = line.partition(',')
+    try:
+      minutes = int(time.mktime(time.strptime(timestr, '%Y-%m-%d %H:%M'))) // 60
+      prices = json.loads(response)
+    except ValueError:
+      print('WARNING: no match on line %d of %s' % (ln, _filename))
+      continue
+    if 'Response' in prices: # api error
+      print('WARNING: %s on line %d of %s' % (prices.get('Message', 'error response'), ln, _filename))
+      continue
+    for (fromCurrency, rates) in prices.items():
+      for (toCurrency, rate) in rates.items():
+        pair = (fromCurrency, toCurrency)
+        if rate == 0:
+          zeros[pair] = zeros.get(pair, 0) + 1
+          continue
+        points.setdefault(pair, {})[minutes] = float(rate)
+  for ((fromCurrency, toCurrency), n) in sorted(zeros.items()):
+    print('WARNING: %d zero %s -> %s price(s) in %s left out' % (n, fromCurrency, toCurrency, _filename))
+  return {pair: sortedSeries(p.items()) for (pair, p) in points.items()}
+
+def cryptowatCandles(_filename):
+  # yields (period, close time, close price) scanning the json incrementally:
+  # a period key opens a list of candles, each candle is an innermost list
+  token = re.compile(r'"(\d+)"\s*:\s*\[|\[([^\[\]]*)\]')
+  period = None
+  buf = ''
+  with openText(_filename) as f:
+    for chunk in iter(lambda: f.read(READ_CHUNK), ''):
+      buf += chunk
+      end = 0
+      for m in token.finditer(buf):
+        if m.group(1) is not None:
+          period = int(m.group(1))
+        elif period is not None and m.group(2).strip() != '':
+          entries = m.group(2).split(',')
+          yield (period, int(entries[0]), float(entries[4]))
+        end = m.end()
+      buf = buf[end:]
+
+def cryptowatSeries(_filename, _fromCurrency, _toCurrency):
+  # several candle periods cover the same times: finer periods take precedence
+  closes = {}
+  for (period, closeTime, price) in cryptowatCandles(_filename):
+    closes.setdefault(period, []).append((closeTime // 60, price))
+  rates = {}
+  for period in sorted(closes.keys(), reverse=True):
+    rates.update(closes[period])
+  return {(_fromCurrency, _toCurrency): sortedSeries(rates.items())}
+
+def writeConversionCSV(_filename, _fromCurrency, _toCurrency, _series):
+  (dates, rates) = _series
+  with open(_filename, 'w') as f:
+    f.write('%s, %s\n' % (_fromCurrency, _toCurrency))
+    f.write(''.join('%s, %s\n' % (minutesToDate(m), r) for (m, r) in zip(dates, rates)))
@@ -0,0 +1,136 @@
+#
+# Account ledger output: csv (with or without formulas) and binary columns
+#
+
+import re
+import zlib
+import struct
+import array
+import heapq
+import operator
+
+from .util import dateToMinutes, minutesToDate
+
+class FileWriter:
+  # Ledger rows are buffered and written out in batches. Formats:
+  #   formula: csv with running-total spreadsheet formulas (default)
+  #   plain:   csv with the values only
+  #   binary:  zlib-compressed columns for downstream analysis:
+  #            header (magic, version, row count, string table size),
+  #            strings (account, base, currency, then the tx ids),
+  #            date (int64 minutes since epoch), id (uint32 string index),
+  #            value, amount, chargeable, profit (float64)
+  BATCH_ROWS = 10000
+  VERSION = 1
+  HEADER = '<4sHII'
+  headings = "Date, Id, Account, Base, Value, Currency, Amount, Chargeable, Profit"
+
+  def __init__(self, _filename, _account, _base, _currency, _format, _directory='./output/'):
+    self.format = _format
+    self.rows = []
+    self.ln = 1
+    self.f = None # opened on first write
+    if self.format == 'binary':
+      self.filename = _directory + _filename + '.ablo'
+      self.fields = (_account, _base, _currency)
+      return
+
+    self.filename = _directory + _filename + '.csv'
+    # constant fields are baked into the row template once
+    constants = [re.sub('([{}])', '\\1\\1', s) for s in (_account, _base, _currency)]
+    template = '{0}, {1}, %s, %s, {2:f}, %s, {3:f}, {4:f}, {5:f}' % tuple(constants)
+    if self.format == 'plain':
+      self.header = self.headings + "\n"
+      self.template = template + "\n"
+    else:
+      self.header = self.headings + ", Base Balance, Currency Balance, Aggregated Rate, Chargeable Total, Profit Total\n"
+      self.template = template + ",=sum(e$2:e{6}),=sum(g$2:g{6}),=max(0; j{6}/k{6}),=sum(h$2:h{6}),=sum(i$2:i{6})\n"
+
+  def addline(self, _date, _id, _value, _amount, _chargeable, _profit):
+    self.rows.append((_date, _id, _value, _amount, _chargeable, _profit))
+    if len(self.rows) >= self.BATCH_ROWS and self.format != 'binary':
+      self.flush()
+
+  def flush(self):
+    if self.f is None:
+      self.f = open(self.filename, 'w')
+      self.f.write(self.header)
+    template = self.template
+    lines = []
+    for row in self.rows:
+      self.ln += 1
+      lines.append(template.format(*row, self.ln))
+    self.f.write(''.join(lines))
+    self.rows.clear()
+
+  def close(self):
+    if self.format == 'binary':
+      self._writeColumns()
+    else:
+      self.flush()
+      self.f.close()
+
+  def _writeColumns(self):
+    strings = list(self.fields)
+    ids = {}
+    columns = [array.array(typecode) for typecode in 'qIdddd']
+    for (date, id_, value, amount, chargeable, profit) in self.rows:
+      if id_ not in ids:
+        ids[id_] = len(strings)
+        strings.append(id_)
+      row = (dateToMinutes(date), ids[id_], value, amount, chargeable, profit)
+      for (column, v) in zip(columns, row):
+        column.append(v)
+    stringdata = '\n'.join(strings).encode()
+    data = struct.pack(self.HEADER, b'ABLO', self.VERSION, len(self.rows), len(stringdata)) + stringdata
+    data += b''.join(column.tobytes() for column in columns)
+    with open(self.filename, 'wb') as f:
+      f.write(zlib.compress(data))
+    self.rows.clear()
+
+
+def readLedgerColumns(_filename):
+  # inverse of the binary FileWriter format: ((account, base, currency), rows)
+  with open(_filename, 'rb') as f:
+    data = zlib.decompress(f.read())
+  (magic, version, n, ns) = struct.unpack_from(FileWriter.HEADER, data)
+  if magic != b'ABLO' or version != FileWriter.VERSION:
+    exit('ERROR: %s is not a binary ledger file' % _filename)
+  offset = struct.calcsize(FileWriter.HEADER)
+  strings = data[offset:offset + ns].decode().split('\n')
+  offset += ns
+  columns = []
+  for typecode in 'qIdddd':
+    column = array.array(typecode)
+    size = column.itemsize * n
+    column.frombytes(data[offset:offset + size])
+    offset += size
+    columns.append(column)
+  dates = {}
+  rows = []
+  for (minutes, i, value, amount, chargeable, profit) in zip(*columns):
+    if minutes not in dates:
+      dates[minutes] = minutesToDate(minutes)
+    rows.append((dates[minutes], strings[i], value, amount, chargeable, profit))
+  return (tuple(strings[:3]), rows)
+
+
+def writeMergedLedger(_accounts, _filename, _base):
+  # heap merge of the per-account ledgers, each already in processing (date)
+  # order, into a single date ordered ledger, written in plain format; rows of
+  # the same date come account by account, each account's in processing order
+  def rows(a):
+    prefix = a.name + ', ' + _base
+    for tx in a.ledger:
+      yield (tx.date, tx.id, a.name, prefix, tx.value, a.currency, tx.amount, tx.chargeable, tx.profit)
+
+  template = '{0}, {1}, {3}, {4:f}, {5}, {6:f}, {7:f}, {8:f}\n'
+  with open(_filename, 'w') as f:
+    f.write(FileWriter.headings + "\n")
+    lines = []
+    for row in heapq.merge(*[rows(a) for a in _accounts], key=operator.itemgetter(0)):
+      lines.append(template.format(*row))
+      if len(lines) >= FileWriter.BATCH_ROWS:
+        f.write(''.join(lines))
+        lines.clear()
+    f.write(''.join(lines))
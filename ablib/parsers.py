@@ -0,0 +1,660 @@
+#
+# Ledger export formats: one registered Parser class per exchange or bank,
+# recognised by the header line of the export, each turning a csv row into
+# an InputTX
+#
+
+import os
+import re
+import io
+import time
+import math
+import struct
+import array
+import hashlib
+
+from .util import TOLERANCE, extractCSVs, dateToMinutes, minutesToDate
+from .symbols import symbols
+
+PARSER_VERSION = 1 # increment when any FileReader format changes its output
+
+class InputTX:
+  def __init__(self, _d, _c1, _v1, _c2, _v2):
+    self.date = _d
+    self.curr1 = _c1
+    self.account1 = _c1
+    self.amount1 = _v1
+    self.curr2 = _c2
+    self.account2 = _c2
+    self.amount2 = _v2
+    self.isTransfer = False
+    self.nativeId = '' # the exchange's own id of the row, if it has one
+
+  def flagAsTransfer(self):
+    self.isTransfer = True
+
+  def intern(self):
+    # swap currency and account names for symbol ids once parsing is done
+    self.curr1 = symbols.id(self.curr1)
+    self.curr2 = symbols.id(self.curr2)
+    self.account1 = symbols.id(self.account1)
+    self.account2 = symbols.id(self.account2)
+    self.nativeId = nativeIdHash(self.nativeId)
+    return self
+
+  def __str__(self):
+    (account1, curr1, account2, curr2) = map(symbols.name, (self.account1, self.curr1, self.account2, self.curr2))
+    return "<%s> %f %s -> %f %s %s%s %s" % (account1, self.amount1, curr1, self.amount2, curr2, ('<' + account2 + '>', '')[account2 == account1], ('', '*')[self.isTransfer], self.date)
+
+
+def nativeIdHash(_id):
+  # 64 bit digest of an exchange's row id, 0 for none
+  if _id == '':
+    return 0
+  return int.from_bytes(hashlib.blake2b(_id.encode(), digest_size=8).digest(), 'little') or 1
+
+
+PARSERS = {} # header line -> Parser class
+
+def register(_class):
+  # class decorator adding a Parser to the registry under each of its headers
+  for header in _class.headers:
+    if header in PARSERS:
+      exit('ERROR: header of %s already registered for %s' % (_class.__name__, PARSERS[header].__name__))
+    PARSERS[header] = _class
+  return _class
+
+def normaliseHeader(_line):
+  # exports differ in line endings and some start with a byte order mark
+  return _line.rstrip().lstrip('\ufeff')
+
+
+class Parser:
+  # one ledger export format; subclasses list the header lines they accept and
+  # turn each following line into an InputTX, a list of them, or None to skip it
+  headers = []
+  usesConversions = False # parsed values depend on the conversion tables
+
+  def __init__(self, _converter=None, _base='GBP', _filename=''):
+    self.converter = _converter
+    self.base = _base
+    self.filename = _filename # some exports share a header, see PoloniexTransfersParser
+
+  def parseline(self, line, ln):
+    raise NotImplementedError
+
+
+@register
+class BasicParser(Parser):
+  # basic
+  headers = ["Date, From-Currency, Amount, To-Currency, Value"]
+
+  def parseline(self, line, ln):
+    entries = extractCSVs(line, 5, ln)
+    if len(entries) == 0:
+      return None # TODO: deal with this return value
+    date = time.strftime("%Y-%m-%d-%H-%M", time.strptime(entries[0], "%d/%m/%Y %H:%M:%S"))
+    return InputTX(date, entries[1], float(entries[2]), entries[3], float(entries[4]))
+
+
+@register
+class PoloniexParser(Parser):
+  # poloniex
+  headers = ["Date,Market,Category,Type,Price,Amount,Total,Fee,Order Number,Base Total Less Fee,Quote Total Less Fee"]
+
+  def parseline(self, line, ln):
+    entries = extractCSVs(line, 11, ln)
+    if len(entries) == 0:
+      return None
+    isMargin = False
+    (timestr, market, category, type_, price, amount, total, fee, num, base, quote) = entries
+    date = time.strftime("%Y-%m-%d-%H-%M", time.strptime(timestr, "%Y-%m-%d %H:%M:%S"))
+    (cur1, cur2) = market.split('/')
+    val1 = float(quote)
+    val2 = float(base)
+
+    if category == 'Margin trade':
+      isMargin = True
+    elif category == 'Settlement':
+      isMargin = True
+      val1 = 0 # paying off lending fees
+    elif category != 'Exchange':
+      exit('ERROR: Unknown trade category "%s" on line %i' % (category, ln))
+
+    if type_ == "Buy": 
+      if val1 < 0 or val2 > 0:
+        exit('ERROR: Inconsistent %s on line %i: %f %s <> %f %s' % (type_, ln, val1, cur1, val2, cur2))
+    elif type_ == "Sell":
+      if val1 > 0 or val2 < 0:
+        exit('ERROR: Inconsistent %s on line %i: %f %s <> %f %s' % (type_, ln, val1, cur1, val2, cur2))
+    else:
+      exit('ERROR: Unknown trade type "%s" on line %i' % (type_, ln))
+
+    tx = InputTX(date, cur1, val1, cur2, val2)
+    tx.nativeId = num # order number, shared by partial fills
+
+    if isMargin:
+      tx.account1 += 'margin'
+      tx.account2 += 'margin'
+
+    return tx
+
+
+@register
+class KrakenParser(Parser):
+  # kraken
+  headers = ['"txid","ordertxid","pair","time","type","ordertype","price","cost","fee","vol","margin","misc","ledgers"']
+  currencyTranslation = {
+    "XXBTZEUR": ("BTC", "EUR"),
+    "XXBTZUSD": ("BTC", "USD"),
+    "XXBTZGBP": ("BTC", "GBP"),
+    "XETHZEUR": ("ETH", "EUR"),
+    "XETHZUSD": ("ETH", "USD"),
+    "XETHZGBP": ("ETH", "GBP"),
+    "XETHXXBT": ("ETH", "BTC"),
+    "XETCZEUR": ("ETC", "EUR"),
+    "XETCXXBT": ("ETC", "BTC"),
+    "XETCXETH": ("ETC", "ETH")
+  }
+
+  def parseline(self, line, ln):
+    entries = extractCSVs(line, 13, ln)
+    if len(entries) == 0:
+      return None
+    (txid, txid2, curstr, timestr, type_, category, price, cost, fee, vol, margin, misc, txid3) = entries
+    timestr = re.sub('\.\d+$','',timestr) # strptime can't cope with milliseconds as decimal of seconds
+    date = time.strftime("%Y-%m-%d-%H-%M", time.strptime(timestr, "%Y-%m-%d %H:%M:%S"))
+
+    #if float(margin) != 0: exit("UNEXPECTED KRAKEN MARGIN USAGE (on line %d)!" % ln)
+    if float(fee)/float(cost) > 0.005 and float(fee) > 0.00001: exit("UNEXPECTED KRAKEN FEE SCHEDULE (%f on line %d)!" % (float(fee)/float(cost), ln))
+
+    val1 = float(vol)
+    val2 = float(cost) - float(fee) # TODO: work out how Kraken reports fee curency
+
+    if type_ == "sell": val1 *= -1
+    elif type_ == "buy": val2 *= -1
+    else: exit("UNEXPECTED KRAKEN TYPE APPEARED ('%s' on line %d)!" % (type_, ln))
+
+    if curstr in self.currencyTranslation:
+      (cur1, cur2) = self.currencyTranslation[curstr]
+    else:
+      exit("ERROR: don't know what currencies are involved in the Kraken pair '%s' on line %d" % (curstr,  ln))
+
+    tx = InputTX(date, cur1, val1, cur2, val2)
+    tx.nativeId = txid
+    return tx
+
+
+@register
+class BitstampParser(Parser):
+  # bitstamp
+  headers = ["Type,Datetime,Account,Amount,Value,Rate,Fee,Sub Type"]
+  validCategories = ["Market", "Deposit", "Withdrawal"]
+
+  def parseline(self, line, ln):
+    entries = extractCSVs(line, 8, ln)
+    if len(entries) == 0:
+      return None
+    (category, timestr, account, amount, value, rate, fee, type_) = entries
+    if category not in self.validCategories:
+      return None
+
+    date = time.strftime("%Y-%m-%d-%H-%M", time.strptime(timestr, "%b. %d, %Y, %I:%M %p")) # Sep. 13, 2014, 08:25 AM
+    (amount, cur1) = amount.split(" ")
+    val1 = float(amount)
+
+    if category == "Market":
+      (value, cur2) = value.split(" ")
+      val2 = float(value)
+      if type_ == "Sell": val1 *= -1
+      elif type_ == "Buy": val2 *= -1
+      else: exit("UNEXPECTED BITSTAMP TYPE APPEARED ('%s' on line %d)!" % (type_, ln))
+
+      if fee != "":
+        (fee, fcur) = fee.split(" ")
+        if fcur == cur1: val1 -= float(fee)
+        elif fcur == cur2: val2 -= float(fee)
+        else: exit("UNEXPECTED BITSTAMP FEE CURRENCY ('%s' on line %d)!" % (fcur, ln))
+
+      tx = InputTX(date, cur1, val1, cur2, val2)
+
+    elif category == "Deposit":
+      val2 = -val1
+      cur2 = cur1
+      tx = InputTX(date, cur1, val1, cur2, val2)
+
+      tx.account1 = "bitstamp" + cur1
+      tx.flagAsTransfer()
+
+    elif category == "Withdrawal":
+      val1 = -val1
+      val2 = -val1
+      cur2 = cur1
+      tx = InputTX(date, cur1, val1, cur2, val2)
+
+      tx.account1 = "bitstamp" + cur1
+      tx.flagAsTransfer()
+
+    else:
+      exit("ERROR: unexpected category '%s' slipped through the switch :-(" % category)
+
+    return tx
+
+
+@register
+class RawParser(Parser):
+  # raw
+  headers = ["Date, Base Currency, Value, Trade Currency, Amount, Transfer Info"]
+  usesConversions = True
+
+  def parseline(self, line, ln):
+    entries = extractCSVs(line, 6, ln)
+    if len(entries) == 0:
+      return None
+    (timestr, cur1, val1, cur2, val2, transferInfo) = entries
+    date = time.strftime("%Y-%m-%d-%H-%M", time.strptime(timestr, "%Y-%m-%d-%H-%M"))
+    if val1 == "" and val2 == "": exit("ERROR: no values for transaction on %s (line %d)" % (date, ln))
+    if val1: val1 = float(val1)
+    if val2: val2 = float(val2)
+
+    if val1 == "":
+      (id1, id2) = (symbols.id(cur1), symbols.id(cur2))
+      if self.converter.canConvertOn(date, id2, id1): val1 = -self.converter.convert(date, id2, id1, val2)
+      else: exit("ERROR: failed to determine value of %f %s in %s on %s (line %d)" % (val2, cur2, cur1, date, ln))
+
+    if val2 == "":
+      (id1, id2) = (symbols.id(cur1), symbols.id(cur2))
+      if self.converter.canConvertOn(date, id1, id2): val2 = -self.converter.convert(date, id1, id2, val1)
+      else: exit("ERROR: failed to determine value of %f %s in %s on %s (line %d)" % (val1, cur1, cur2, date, ln))
+
+    tx = InputTX(date, cur1, val1, cur2, val2)
+    if transferInfo != "": 
+      if val1 != -val2 or cur1 != cur2:
+        exit("ERROR: Invalid account transfer set for %s (line %d): '%s': %f %s -> %f %s" % (date, ln, transferInfo, val1, cur1, val2, cur2))
+      tx.account1 = re.sub('->[^-]*$', '', transferInfo) + tx.curr1
+      tx.account2 = re.sub('^[^-]*->', '', transferInfo) + tx.curr2
+      tx.flagAsTransfer()
+
+    return tx
+
+
+@register
+class PoloniexTransfersParser(Parser):
+  # poloniex deposit and withdrawal histories, told apart by file name
+  # (e.g. poloniex.depositHistory.csv and poloniex.withdrawalHistory.csv)
+  headers = ['Date,Currency,Amount,Address,Status']
+  # TODO: more accurate fee schedule
+  fees = {
+    'BTC': 0.0001,
+    'XMR': 0.01,
+    'ETH': 0.01
+  }
+
+  def __init__(self, _converter=None, _base='GBP', _filename=''):
+    Parser.__init__(self, _converter, _base, _filename)
+    self.isWithdrawal = 'withdrawal' in os.path.basename(_filename).lower()
+
+  def parseline(self, line, ln):
+    if 'COMPLETE' not in line or 'ERROR' in line:
+      print('WARNING: deposit not marked as COMPLETE and/or marked as ERROR on line %i in "%s"' % (ln, self.filename))
+      return None
+    entries = extractCSVs(line, 5, ln)
+    if len(entries) == 0:
+      return None
+    (timestr, currency, amount, address, status) = entries
+    date = time.strftime('%Y-%m-%d-%H-00', time.strptime(timestr, '%Y-%m-%d %H:%M:%S'))
+    amount = float(amount)
+    if not self.isWithdrawal:
+      tx = InputTX(date, currency, -amount, currency, amount)
+      tx.account2 = 'poloniex' + currency
+      tx.flagAsTransfer()
+      return tx
+
+    # fees on withdrawals
+    if currency not in self.fees:
+      exit('ERROR: unknown poloniex withdrawal fee for %s on line %i in "%s"' % (currency, ln, self.filename))
+    fee = self.fees[currency]
+    amount -= fee
+    tx = InputTX(date, currency, -amount, currency, amount)
+    tx.account1 = 'poloniex' + currency
+    tx.flagAsTransfer()
+    return [InputTX(date, self.base, 0.0, currency, -fee), tx]
+
+
+@register
+class KrakenLedgerParser(Parser):
+  # kraken ledger: deposits, withdrawals and transfers (trades are read from
+  # the trades export by KrakenParser)
+  headers = ['"txid","refid","time","type","aclass","asset","amount","fee","balance"']
+  currencyTranslation = {
+    "ZEUR": "EUR",
+    "ZUSD": "USD",
+    "ZGBP": "GBP",
+    "XETH": "ETH",
+    "XXBT": "BTC",
+    "XETC": "ETC",
+    "XXLM": "XLM",
+  }
+
+  def parseline(self, line, ln):
+    entries = extractCSVs(line, 9, ln)
+    if len(entries) == 0:
+      return None
+    (txid, refid, timestr, type_, aclass, asset, amount, fee, balance) = entries
+    if asset == "KFEE" or type_ not in ('deposit', 'withdrawal', 'transfer'):
+      return None
+    timestr = re.sub('\.\d+$','',timestr) # strptime can't cope with milliseconds as decimal of seconds
+    date = time.strftime('%Y-%m-%d-%H-00', time.strptime(timestr, '%Y-%m-%d %H:%M:%S'))
+    if asset not in self.currencyTranslation:
+      exit("ERROR: don't know the Kraken asset '%s' on line %d" % (asset, ln))
+    currency = self.currencyTranslation[asset]
+    amount = float(amount)
+
+    if type_ == 'transfer':
+      txs = [InputTX(date, self.base, 0.0, currency, amount)]
+    else: # deposits and withdrawals both as seen from outside kraken
+      tx = InputTX(date, currency, -amount, currency, amount)
+      tx.account2 = 'kraken' + currency
+      tx.flagAsTransfer()
+      txs = [tx]
+
+    fee = abs(float(fee))
+    if fee > 0:
+      txs.append(InputTX(date, self.base, 0.0, currency, -fee))
+    for tx in txs:
+      tx.nativeId = txid
+    return txs
+
+
+@register
+class CurrencyFairTransfersParser(Parser):
+  # currencyfair transfers
+  headers = ['Reference,Date,Type,Description,Amount,Currency,Status,"Received Date","Transfer Reference"']
+
+  def parseline(self, line, ln):
+    entries = extractCSVs(line, 9, ln)
+    if len(entries) == 0:
+      return None
+    (ref, instructionDate, type_, desc, amount, currency, status, actionDate, reference) = entries
+    if status != "confirmed":
+      return None
+    date = time.strftime("%Y-%m-%d-%H-%M", time.strptime(actionDate, "%d-%b-%Y %H:%M"))
+    amount = re.sub(',', '', amount)
+    cur2 = currency
+    val2 = float(amount)
+    if type_ == "Deposit In" or type_ == "Transfer Out":
+      cur1 = currency
+      val1 = -float(amount)
+      tx = InputTX(date, cur1, val1, cur2, val2)
+      tx.account2 = "currencyfair" + cur1
+      tx.flagAsTransfer()
+    elif type_ == "Referral Success":
+      cur1 = self.base
+      val1 = 0.0
+      tx = InputTX(date, cur1, val1, cur2, val2)
+    else:
+      exit("ERROR: unexpected type '%s' encountered in line %d" % (type_, ln))
+
+    tx.nativeId = ref
+    return tx
+
+
+@register
+class CurrencyFairTradesParser(Parser):
+  # currencyfair trades
+  headers = ['Reference,Date,Exchange Type,Order Rate,Amount Placed,Status,Amount Purchased']
+
+  def parseline(self, line, ln):
+    entries = extractCSVs(line, 7, ln)
+    if len(entries) == 0:
+      return None
+    (ref, timestr, currencies, rate, given, status, received) = entries
+    if status != "matched":
+      #print("DEBUG: ignoring cancelled CurrencyFair exchange '%s'" % line)
+      return None
+    date = time.strftime("%Y-%m-%d-%H-%M", time.strptime(timestr, "%d-%b-%Y %H:%M"))
+    (val1, cur1) = given.split(" ")
+    (val2, cur2) = received.split(" ")
+    val1 = -float(re.sub(',', '', val1))
+    val2 = float(re.sub(',', '', val2))
+
+    tx = InputTX(date, cur1, val1, cur2, val2)
+    tx.nativeId = ref
+    return tx
+
+
+@register
+class BittrexParser(Parser):
+  # bittrex trades
+  headers = ['"Closed Date","Opened Date","Market","Type","Bid/Ask","Units Filled","Units Total","Actual Rate","Cost / Proceeds"']
+
+  def parseline(self, line, ln):
+    entries = extractCSVs(line, 9, ln)
+    if len(entries) == 0:
+      return None
+    (timestr, opentimestr, currencies, type_, quoterate, amount, ordertotal, rate, cost) = entries
+    date = time.strftime("%Y-%m-%d-%H-%M", time.strptime(timestr, "%m/%d/%Y %I:%M:%S %p")) # 09/29/2016 02:16:36 AM
+    (cur1, cur2) = currencies.split("-")
+    val1 = float(cost)
+    val2 = float(amount)
+
+    return InputTX(date, cur1, val1, cur2, val2)
+
+
+@register
+class BitfinexTradesParser(Parser):
+  # bitfinex trades
+  headers = ['#,Pair,Amount,Price,Date']
+
+  def parseline(self, line, ln):
+    entries = extractCSVs(line, 5, ln)
+    if len(entries) == 0:
+      return None
+    (id_, currencies, amount, rate, timestr) = entries
+    date = time.strftime("%Y-%m-%d-%H-%M", time.strptime(timestr, "%Y-%m-%d %H:%M:%S")) # 2016-01-08 20:02:45
+    cur1 = currencies[:3]
+    cur2 = currencies[-3:]
+    val1 = float(amount)
+    val2 = -float(amount) * float(rate)
+
+    tx = InputTX(date, cur1, val1, cur2, val2)
+    tx.nativeId = id_
+    return tx
+
+
+@register
+class BitfinexLedgerParser(Parser):
+  # bitfinex ledger
+  headers = ['Currency,Description,Amount,Balance,Date']
+
+  def parseline(self, line, ln):
+    entries = extractCSVs(line, 5, ln)
+    if len(entries) == 0:
+      return None
+    (currency, desc, amount, balance, timestr) = entries
+    date = time.strftime("%Y-%m-%d-%H-%M", time.strptime(timestr, "%Y-%m-%d %H:%M:%S")) # 2016-01-08 20:02:45
+    cur1 = 'GBP'
+    cur2 = currency
+    val1 = 0.0
+    val2 = float(amount)
+
+    if re.match('^Transfer', desc):
+      tx = None
+    elif re.search('Deposit', desc) != None or re.search('Withdrawal', desc) != None:
+      cur1 = cur2
+      val1 = -val2
+      tx = InputTX(date, cur1, val1, cur2, val2)
+      tx.account2 = 'bitfinex' + cur2
+      tx.flagAsTransfer()
+    elif (re.match('^Extraordinary', desc) != None or 
+          re.match('^Trading fee', desc) != None or 
+          re.match('^Settlement', desc) != None or 
+          re.match('^Adjustment', desc) != None or 
+          re.match('^Position', desc) != None or 
+          re.match('^Exchange', desc) != None or
+          re.match('^BFX ', desc) != None):
+      tx = InputTX(date, cur1, val1, cur2, val2)
+    else:
+      exit('ERROR: unknown ledger description \'%s\' reading bitfinex report file on line %d' % (desc, ln))
+
+    # check
+    if re.match('^Exchange', desc):
+      m = re.match('^Exchange (\S+) (\w{3}) for (\w{3}) @ (\S+) on', desc)
+      if m == None:
+        exit("ERROR: expecting '%s' but got '%s' on line %d" % ('^Exchange (\S+) (\w{3}) for (\w{3}) @ (\S+) on', desc, ln))
+      (a1, c1, c2, rate) = m.groups()
+      if c1 == currency:
+        if abs(abs(float(a1)) - abs(val2)) > TOLERANCE:
+          exit("ERROR: ledger amount %f doesn't match amount %f in exchange entry description '%s' on line %d" % (val2, a1, desc, ln))
+        cur1 = c2
+        val1 = -val2 * float(rate)
+      elif c2 == currency:
+        cur1 = c1
+        val1 = -math.copysign(float(a1), val2)
+        val2check = -val1 * float(rate)
+        if abs(val2 - val2check) > TOLERANCE:
+          exit("ERROR: ledger amount %f doesn't match calculated amount %f in exchange entry description '%s' on line %d" % (val2, val2check, desc, ln))
+      else:
+        exit("ERROR: couldn't find ledger currency '%s' in exchange entry description '%s' -> '%s' & '%s' on line %d" % (currency, desc, c1, c2, ln))
+
+    return tx
+
+
+@register
+class GatecoinParser(Parser):
+  # gatecoin
+  headers = ['Pair,Type,Price,Amount,Fee Rate,maker/taker,Total paid,Amount received,Date and time']
+
+  def parseline(self, line, ln):
+    entries = extractCSVs(line, 9, ln)
+    if len(entries) == 0:
+      return None
+    (currencies, type_, rate, offer, feerate, category, paid, received, timestr) = entries
+    date = time.strftime("%Y-%m-%d-%H-%M", time.strptime(timestr, "%Y-%m-%d %H:%M:%S")) # 2016-05-07 00:39:42
+    curcheck1 = currencies[:3]
+    curcheck2 = currencies[-3:]
+    (val1, cur1) = paid.split(" ")
+    (val2, cur2) = received.split(" ")
+    val1 = -float(val1)
+    val2 = float(val2)
+
+    # currency check
+    if not ((curcheck1 == cur1 and curcheck2 == cur2) or (curcheck1 == cur2 and curcheck2 == cur1)): 
+      exit('ERROR: currency mismatch in Gatecoin file on line %d: (%s-%s) vs (%s-%s)' % (ln, curcheck1, curcheck2, cur1, cur2))
+    # fee check
+    feeMultiplier = 1.0 + float(feerate[:-1]) / 100
+    total = feeMultiplier * float(offer) * float(rate)
+    if abs(total + val1) > 1e-5: # ledger entries rounded by gatecoin to nearest 1e-5
+      exit('ERROR: total paid mismatch in Gatecoin file on line %d: %f vs %f' % (ln, total, val1))
+
+    return InputTX(date, cur1, val1, cur2, val2)
+
+
+class FileReader:
+  # picks the registered parser for a ledger export from its header line
+  def __init__(self, _firstline, _converter=None, _base='GBP', _filename=''):
+    header = normaliseHeader(_firstline)
+    if header not in PARSERS:
+      exit("ERROR: Unknown file format with first line '" + _firstline.rstrip() + "'")
+    self.parser = PARSERS[header](_converter, _base, _filename)
+    self.usesConversions = self.parser.usesConversions
+
+  def parse(self, line, ln):
+    # -> list of the line's InputTXs
+    txs = self.parser.parseline(line, ln)
+    if txs is None:
+      return []
+    if isinstance(txs, InputTX):
+      txs = [txs]
+    threshold = 1e-8
+    return [tx.intern() for tx in txs if abs(tx.amount1) >= threshold or abs(tx.amount2) >= threshold]
+
+
+def parseFile(_data, _converter=None, _base='GBP', _filename='', _errors=None):
+  # whole export (bytes) -> ([(line number, InputTX)], whether it used the conversion tables)
+  # Given an _errors list, a failing line is added to it as (line number,
+  # message) and left out, instead of ending the run (see validate.py)
+  parsed = []
+  usesConversions = False
+  ln = 0
+  for line in io.StringIO(_data.decode(), newline=None):
+    ln += 1
+
+    try:
+      if ln == 1:
+        filereader = FileReader(line, _converter, _base, _filename)
+        usesConversions = filereader.usesConversions
+      else:
+        for tx in filereader.parse(line, ln):
+          parsed.append((ln, tx))
+    except (SystemExit, Exception) as e:
+      if _errors is None:
+        raise
+      _errors.append((ln, errorMessage(e)))
+      if ln == 1: # unknown format
+        break
+  return (parsed, usesConversions)
+
+def errorMessage(_e):
+  # exit('ERROR: ...') messages as they are, anything else (e.g. a missing
+  # column) by its type
+  if isinstance(_e, SystemExit):
+    return re.sub('^ERROR: ', '', str(_e.code))
+  return '%s: %s' % (type(_e).__name__, _e)
+
+
+# Parsed rows packed as columns, the form in which worker processes hand back
+# their files and the ledger cache stores them; names travel as strings since
+# symbol ids are local to a process:
+#   header: row count, string table size (uint32)
+#   strings: newline separated currency and account names
+#   columns: line (int32), date (int64 minutes since epoch), curr1, curr2,
+#            account1, account2 (uint16 string ids), amount1, amount2 (float64),
+#            isTransfer (uint8), nativeId (uint64 digest)
+PACKED_HEADER = '<II'
+PACKED_COLUMNS = 'iqHHHHddBQ'
+
+def packParsed(_parsed):
+  strings = {}
+  def intern(i):
+    s = symbols.name(i)
+    if s not in strings:
+      strings[s] = len(strings)
+    return strings[s]
+
+  columns = [array.array(typecode) for typecode in PACKED_COLUMNS]
+  for (ln, tx) in _parsed:
+    minutes = dateToMinutes(tx.date)
+    row = (ln, minutes, intern(tx.curr1), intern(tx.curr2), intern(tx.account1), intern(tx.account2), tx.amount1, tx.amount2, tx.isTransfer, tx.nativeId)
+    for (column, v) in zip(columns, row):
+      column.append(v)
+
+  stringdata = '\n'.join(strings.keys()).encode()
+  data = struct.pack(PACKED_HEADER, len(_parsed), len(stringdata)) + stringdata
+  return data + b''.join(column.tobytes() for column in columns)
+
+def unpackParsed(_data, _offset=0):
+  (n, ns) = struct.unpack_from(PACKED_HEADER, _data, _offset)
+  offset = _offset + struct.calcsize(PACKED_HEADER)
+  strings = [symbols.id(s) for s in _data[offset:offset + ns].decode().split('\n')]
+  offset += ns
+  columns = []
+  for typecode in PACKED_COLUMNS:
+    column = array.array(typecode)
+    size = column.itemsize * n
+    column.frombytes(_data[offset:offset + size])
+    offset += size
+    columns.append(column)
+
+  dates = {}
+  parsed = []
+  for (ln, minutes, c1, c2, a1, a2, v1, v2, isTransfer, nativeId) in zip(*columns):
+    if minutes not in dates:
+      dates[minutes] = minutesToDate(minutes)
+    tx = InputTX(dates[minutes], strings[c1], v1, strings[c2], v2)
+    tx.account1 = strings[a1]
+    tx.account2 = strings[a2]
+    if isTransfer: tx.flagAsTransfer()
+    tx.nativeId = nativeId
+    parsed.append((ln, tx))
+  return parsed
@@ -0,0 +1,84 @@
+#
+# Per-stage timings and event counters (--profile)
+#
+
+import time
+import json
+
+try:
+  import resource
+except ImportError:
+  resource = None # no peak rss reporting on this platform
+
+
+class ProfileStage:
+  def __init__(self, _profiler, _name):
+    self.profiler = _profiler
+    self.name = _name
+    self.rows = 0
+
+  def __enter__(self):
+    self.wall = time.perf_counter()
+    self.cpu = time.process_time()
+    return self
+
+  def __exit__(self, *exc):
+    self.profiler.record(self.name, time.perf_counter() - self.wall, time.process_time() - self.cpu, self.rows)
+    return False
+
+
+class NullStage:
+  rows = 0
+  def __enter__(self): return self
+  def __exit__(self, *exc): return False
+
+
+class Profiler:
+  # --profile: wall time, cpu time, peak rss and row counts per stage, plus
+  # event counters, written out as json; repeated stages are accumulated
+  def __init__(self, _filename=''):
+    self.filename = _filename
+    self.enabled = _filename != ''
+    self.stages = {}
+    self.counters = {}
+    self.nullStage = NullStage()
+    self.start = (time.perf_counter(), time.process_time())
+
+  def stage(self, _name):
+    if not self.enabled:
+      return self.nullStage
+    return ProfileStage(self, _name)
+
+  def count(self, _name, _n=1):
+    if self.enabled:
+      self.counters[_name] = self.counters.get(_name, 0) + _n
+
+  def peakRSS(self):
+    if resource is None:
+      return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # KiB on linux
+
+  def record(self, _name, _wall, _cpu, _rows):
+    if _name not in self.stages:
+      self.stages[_name] = {'stage': _name, 'calls': 0, 'wallTime': 0.0, 'cpuTime': 0.0, 'rows': 0}
+    s = self.stages[_name]
+    s['calls'] += 1
+    s['wallTime'] += _wall
+    s['cpuTime'] += _cpu
+    s['rows'] += _rows
+    s['peakRSS'] = self.peakRSS()
+
+  def write(self, _options):
+    if not self.enabled:
+      return
+    report = {
+      'args': _options,
+      'wallTime': time.perf_counter() - self.start[0],
+      'cpuTime': time.process_time() - self.start[1],
+      'peakRSS': self.peakRSS(),
+      'stages': list(self.stages.values()),
+      'counters': self.counters
+    }
+    with open(self.filename, 'w') as f:
+      json.dump(report, f, indent=2)
+      f.write('\n')
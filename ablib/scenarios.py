@@ -0,0 +1,84 @@
+#
+# What-if comparisons (--scenarios): one ledger is loaded, parsed and cached
+# once, then each scenario is evaluated as a variant of it in a forked worker
+#
+
+import io
+import os
+import gc
+import json
+import contextlib
+import multiprocessing
+
+scenarioState = None
+
+def evaluateScenario(_index):
+  # runs in a worker (or in-process): the ledger and scenarios are inherited
+  # through fork, only the totals and any warnings come back
+  (ledger, scenarios) = scenarioState
+  overrides = dict(scenarios[_index], incremental=False, save_snapshot=False)
+  name = overrides.pop('name', 'scenario %d' % (_index + 1))
+  out = io.StringIO()
+  try:
+    with contextlib.redirect_stdout(out):
+      (rows, total) = ledger.variant(**overrides).evaluate()
+  except SystemExit as e:
+    return (name, None, str(e))
+  except TypeError as e: # unknown option
+    return (name, None, 'ERROR: %s' % e)
+  messages = [l for l in out.getvalue().split('\n') if l.startswith('WARNING') or l.startswith('ERROR')]
+  return (name, total, '\n'.join(messages))
+
+
+class ScenarioRunner:
+  # Scenarios are dicts of Ledger options to change, plus an optional name:
+  #   [{"name": "60 day B&B", "bb_days": 60},
+  #    {"name": "EUR valued first", "priorities": ["EUR", "BTC", "USD", "CHF"]},
+  #    {"name": "without kraken", "exclude": ["kraken"]},
+  #    {"name": "in EUR", "base": "EUR"}]
+  # The unchanged ledger is always evaluated first as "baseline".
+  def __init__(self, _ledger, _scenarios, _jobs=0):
+    self.ledger = _ledger
+    self.scenarios = [{'name': 'baseline'}] + list(_scenarios)
+    self.jobs = _jobs
+
+  def run(self):
+    # [(name, totals or None, warnings or error)] in scenario order
+    global scenarioState
+    self.ledger.preload()
+    scenarioState = (self.ledger, self.scenarios)
+    workers = min(self.jobs or os.cpu_count() or 1, len(self.scenarios))
+    if workers <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+      return [evaluateScenario(i) for i in range(len(self.scenarios))]
+
+    # keep the garbage collector from touching (and so copying) the shared
+    # parsed rows and conversion tables in the workers
+    gc.freeze()
+    try:
+      with multiprocessing.get_context('fork').Pool(workers) as pool:
+        return pool.map(evaluateScenario, range(len(self.scenarios)))
+    finally:
+      gc.unfreeze()
+
+  def table(self, _results):
+    base = self.ledger.base
+    lines = ["Scenario, \tProfit, \tProceeds, \tChargeable, \tDisposals, \tChange"]
+    baseline = None
+    for (name, total, message) in _results:
+      if total is None:
+        lines.append('%s,\t%s' % (name, message))
+        continue
+      if baseline is None:
+        baseline = total['chargeable']
+      lines.append('%s,\t%f,\t%f,\t%f,\t%i,\t%+f' % (name, total['profit'], total['proceeds'], total['chargeable'], total['disposals'], total['chargeable'] - baseline))
+      for m in message.split('\n'):
+        if m: lines.append('  %s' % m)
+    lines.append('(%s, except where a scenario changes the base)' % base)
+    return '\n'.join(lines)
+
+def loadScenarios(_filename):
+  with open(_filename) as f:
+    scenarios = json.load(f)
+  if not isinstance(scenarios, list) or not all(isinstance(s, dict) for s in scenarios):
+    exit('ERROR: %s should hold a json list of scenario objects' % _filename)
+  return scenarios
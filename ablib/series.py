@@ -0,0 +1,177 @@
+#
+# Portfolio valuation series (--series): balance, cost and market value of
+# every account at each hour or day of the period
+#
+
+import math
+import zlib
+import heapq
+import struct
+import array
+import operator
+import itertools
+
+from .util import FLOAT_ZERO, dateToMinutes, minutesToDate
+from .symbols import symbols
+
+STEPS = {'hour': 60, 'day': 24 * 60}
+
+
+def rateColumn(_converter, _account, _baseId, _hours):
+  # the account currency's rate to the base at each step (by its hour key),
+  # the last known rate carried forward over gaps, NaN before any; None
+  # without conversion data
+  if _account.currencyId == _baseId:
+    return array.array('d', itertools.repeat(1.0, len(_hours)))
+  if symbols.pair(_account.currencyId, _baseId) in _converter.conversions:
+    (rates, inverse) = (_converter.conversions[symbols.pair(_account.currencyId, _baseId)], False)
+  elif symbols.pair(_baseId, _account.currencyId) in _converter.conversions:
+    (rates, inverse) = (_converter.conversions[symbols.pair(_baseId, _account.currencyId)], True)
+  else:
+    return None
+  column = array.array('d')
+  rate = math.nan
+  for hour in _hours:
+    r = rates.get(hour)
+    if r is not None:
+      rate = 1.0 / r if inverse else r
+    column.append(rate)
+  return column
+
+
+class SeriesAccount:
+  # one account's columns, written up to a step whenever the account changes
+  # (and once at the end), so that steps without changes cost no Python work
+  def __init__(self, _rates):
+    self.rates = _rates
+    self.columns = [array.array('d') for i in range(4)] # balance, cost, pool cost, value
+    self.balance = 0.0
+    self.cost = 0.0
+    self.poolCost = 0.0
+
+  def fill(self, _n):
+    # the current state for the steps up to (not including) _n
+    (balances, costs, poolCosts, values) = self.columns
+    f = len(balances)
+    if f >= _n:
+      return
+    balances.extend(itertools.repeat(self.balance, _n - f))
+    costs.extend(itertools.repeat(self.cost, _n - f))
+    poolCosts.extend(itertools.repeat(self.poolCost, _n - f))
+    if abs(self.balance) < FLOAT_ZERO:
+      values.extend(itertools.repeat(0.0, _n - f))
+    else:
+      values.extend(map(self.balance.__mul__, self.rates[f:_n]))
+
+
+def portfolioSeries(_accounts, _converter, _baseId, _start, _end, _step):
+  # -> (step dates, per account [balance, cost, pool cost, value] columns,
+  # [cost, pool cost, value] total columns); cost is the running sum of the
+  # ledger values (the report's Cost), pool cost the Section 104 pool cost.
+  # The account ledgers and pool histories (each in date order) are merged
+  # into one stream of changes, and each account's columns are only written
+  # when it changes. The accounts file rows are dated _start (by default
+  # 1000-01-01), so the steps start at the first other transaction, or at
+  # _start if that is earlier.
+  step = STEPS[_step]
+  ledgers = [a.ledger for a in _accounts if len(a.ledger) > 0]
+  first = min([next((tx.date for tx in ledger if tx.date != _start), _end) for ledger in ledgers] + [_end])
+  last = max([ledger[-1].date for ledger in ledgers] + [first])
+  start = dateToMinutes(max(first, _start)) // step * step
+  end = dateToMinutes(min(last, _end))
+
+  dates = array.array('q', range(start, end + 1, step))
+  stepDates = [minutesToDate(m) for m in dates]
+  hours = [d[:-2] + '00' for d in stepDates]
+  rates = {}
+  walkers = []
+  for a in _accounts:
+    if a.currencyId not in rates:
+      rates[a.currencyId] = rateColumn(_converter, a, _baseId, hours)
+    column = rates[a.currencyId]
+    if column is None:
+      print('WARNING: no %s -> %s conversion data, no market value series for "%s"' % (a.currency, a.base, a.name))
+      column = array.array('d', itertools.repeat(math.nan, len(hours)))
+    walkers.append(SeriesAccount(column))
+
+  # (date, account index, pool cost or None, tx); a step includes the changes
+  # dated up to and including it
+  changes = []
+  for (i, a) in enumerate(_accounts):
+    changes.append(zip(map(operator.attrgetter('date'), a.ledger), itertools.repeat(i), itertools.repeat(None), a.ledger))
+    pool = a.poolHistory
+    changes.append(zip(map(operator.itemgetter(0), pool), itertools.repeat(i), map(operator.itemgetter(2), pool), itertools.repeat(None)))
+  n = len(dates)
+  k = 0
+  for (date, i, poolCost, tx) in heapq.merge(*changes, key=operator.itemgetter(0)):
+    while k < n and stepDates[k] < date:
+      k += 1
+    if k == n:
+      break
+    w = walkers[i]
+    w.fill(k)
+    if tx is None:
+      w.poolCost = poolCost
+    else:
+      w.balance += tx.amount
+      w.cost += tx.value
+  for w in walkers:
+    w.fill(n)
+
+  columns = [w.columns for w in walkers]
+  totals = []
+  for j in (1, 2, 3):
+    # summed account by account, in order
+    total = array.array('d', itertools.repeat(0.0, n))
+    for c in columns:
+      total = array.array('d', map(operator.add, total, c[j]))
+    totals.append(total)
+  return (dates, columns, totals)
+
+
+# file format: zlib-compressed, header (magic, version, step minutes, number
+# of steps, number of accounts, string table size), strings (base, then name
+# and currency per account), date (int64 minutes since epoch), then float64
+# balance, cost, pool cost and value per account, then the total cost, pool
+# cost and value; values are NaN where a balance was held before any
+# conversion rate was known
+VERSION = 1
+HEADER = '<4sHIIII'
+
+def writeSeries(_filename, _accounts, _base, _step, _series):
+  (dates, columns, totals) = _series
+  strings = [_base]
+  for a in _accounts:
+    strings += [a.name, a.currency]
+  names = '\n'.join(strings).encode()
+  parts = [struct.pack(HEADER, b'ABLS', VERSION, STEPS[_step], len(dates), len(columns), len(names)), names, dates.tobytes()]
+  for c in columns:
+    parts += [column.tobytes() for column in c]
+  parts += [column.tobytes() for column in totals]
+  with open(_filename, 'wb') as f:
+    f.write(zlib.compress(b''.join(parts), 6))
+
+def readSeries(_filename):
+  # inverse of writeSeries: (base, [(account, currency)], step minutes,
+  # dates as minutes, per account columns, total columns)
+  with open(_filename, 'rb') as f:
+    data = zlib.decompress(f.read())
+  (magic, version, step, n, na, ns) = struct.unpack_from(HEADER, data)
+  if magic != b'ABLS' or version != VERSION:
+    exit('ERROR: %s is not a valuation series file' % _filename)
+  offset = struct.calcsize(HEADER)
+  strings = data[offset:offset + ns].decode().split('\n')
+  offset += ns
+
+  def column(typecode):
+    nonlocal offset
+    c = array.array(typecode)
+    c.frombytes(data[offset:offset + c.itemsize * n])
+    offset += c.itemsize * n
+    return c
+
+  dates = column('q')
+  columns = [[column('d') for i in range(4)] for a in range(na)]
+  totals = [column('d') for i in range(3)]
+  accounts = list(zip(strings[1::2], strings[2::2]))
+  return (strings[0], accounts, step, dates, columns, totals)
@@ -0,0 +1,138 @@
+#
+# Long-running query mode (--serve)
+#
+
+import os
+import re
+import glob
+import json
+import asyncio
+import urllib.parse
+
+from .symbols import symbols
+from .dates import dayOrdinal
+from .parsers import errorMessage
+
+
+class QueryServer:
+  # --serve: keeps the conversion tables, parsed ledgers and processed accounts
+  # in memory and answers json queries over http (asyncio), rerunning when any
+  # data file changes:
+  #   /convert?amount=N&from=BTC&to=GBP&date=YYYY-MM-DD-HH-MM
+  #   /gains?account=X&start=A&end=B
+  #   /balance?account=X&date=D
+  #   /accounts
+  #   /reload
+  def __init__(self, _address, _ledger, _reloadInterval=2.0):
+    self.address = _address
+    self.ledger = _ledger
+    self.reloadInterval = _reloadInterval
+    self.mtimes = self.scan()
+
+  def scan(self):
+    o = self.ledger.options
+    files = glob.glob(o.input) + glob.glob(o.conversion) + glob.glob(o.accounts)
+    return {f: os.stat(f).st_mtime_ns for f in files}
+
+  def reload(self):
+    mtimes = self.scan()
+    if mtimes == self.mtimes:
+      return False
+    print('Data files changed, reloading ...')
+    changed = set(f for f in mtimes if self.mtimes.get(f) != mtimes[f])
+    try:
+      self.ledger.reload(changed)
+    except SystemExit as e:
+      print('ERROR: reload failed, still serving previous results: %s' % e)
+    self.mtimes = mtimes
+    return True
+
+  def account(self, _name):
+    a = self.ledger.account(_name)
+    if a is None:
+      raise ValueError('unknown account "%s"' % _name)
+    return a
+
+  def query(self, _path, _params):
+    def param(name, default=None):
+      if name in _params: return _params[name][0]
+      if default is None: raise ValueError('missing parameter "%s"' % name)
+      return default
+
+    def dateParam(name, default=None):
+      date = param(name, default)
+      try:
+        dayOrdinal(date)
+      except ValueError:
+        raise ValueError('invalid date "%s" for parameter "%s"' % (date, name))
+      return date
+
+    if _path == '/convert':
+      date = dateParam('date')
+      amount = float(param('amount'))
+      (fromCurrency, toCurrency) = (param('from'), param('to', self.ledger.base))
+      if fromCurrency == toCurrency:
+        return {'value': amount}
+      (fromId, toId) = (symbols.ids.get(fromCurrency), symbols.ids.get(toCurrency))
+      if fromId is None or toId is None or not self.ledger.converter.canConvertOn(date, fromId, toId):
+        raise ValueError('no conversion from %s to %s on %s' % (fromCurrency, toCurrency, date))
+      return {'value': self.ledger.converter.convert(date, fromId, toId, amount)}
+    elif _path == '/gains':
+      a = self.account(param('account'))
+      (start, end) = (dateParam('start', '1000-01-01-00-00'), dateParam('end', '2099-12-31-23-59'))
+      (proceeds, disposals) = a.proceedsBetween(start, end)
+      return {'account': a.name, 'chargeable': a.chargeableBetween(start, end), 'profit': a.profitBetween(start, end), 'proceeds': proceeds, 'disposals': disposals}
+    elif _path == '/balance':
+      a = self.account(param('account'))
+      date = dateParam('date', '2099-12-31-23-59')
+      return {'account': a.name, 'balance': a.balanceAt(date), 'cost': a.costAt(date)}
+    elif _path == '/accounts':
+      return {'accounts': [symbols.name(key) for key in self.ledger.accounts.keys()]}
+    elif _path == '/reload':
+      return {'reloaded': self.reload()}
+    else:
+      raise LookupError('unknown query "%s"' % _path)
+
+  async def handle(self, _reader, _writer):
+    try:
+      request = (await _reader.readline()).decode('latin-1').split()
+      while (await _reader.readline()) not in (b'\r\n', b'\n', b''):
+        pass # ignore headers
+      url = urllib.parse.urlsplit(request[1] if len(request) > 1 else '/')
+      try:
+        (status, body) = ('200 OK', self.query(url.path, urllib.parse.parse_qs(url.query)))
+      except LookupError as e:
+        (status, body) = ('404 Not Found', {'error': str(e)})
+      except ValueError as e:
+        (status, body) = ('400 Bad Request', {'error': str(e)})
+      except (SystemExit, Exception) as e:
+        # anything else (including an exit() deep in the ledger code) fails
+        # this query only, the server carries on
+        (status, body) = ('500 Internal Server Error', {'error': errorMessage(e)})
+      data = json.dumps(body).encode()
+      _writer.write(('HTTP/1.0 %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n' % (status, len(data))).encode() + data)
+      await _writer.drain()
+    finally:
+      _writer.close()
+
+  async def watch(self):
+    while True:
+      await asyncio.sleep(self.reloadInterval)
+      self.reload()
+
+  async def main(self):
+    if re.match('^[^/]*:\d+$', self.address):
+      (host, port) = self.address.rsplit(':', 1)
+      server = await asyncio.start_server(self.handle, host, int(port))
+    else:
+      server = await asyncio.start_unix_server(self.handle, self.address)
+    print('Serving queries on %s' % self.address)
+    asyncio.ensure_future(self.watch())
+    async with server:
+      await server.serve_forever()
+
+  def serve(self):
+    try:
+      asyncio.run(self.main())
+    except KeyboardInterrupt:
+      pass
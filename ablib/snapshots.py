@@ -0,0 +1,131 @@
+#
+# Saved account state: end of period snapshots (--save-snapshot/--resume)
+# and per-account checkpoints for --incremental runs
+#
+
+import os
+import glob
+import json
+import hashlib
+import struct
+import operator
+import itertools
+
+from .symbols import symbols
+from .output import FileWriter, readLedgerColumns
+from .accounts import txFromRow
+
+def saveSnapshot(_accounts, _date, _directory, _base):
+  # one json file per closed period, named by its end date
+  snapshot = {
+    'date': _date,
+    'base': _base,
+    'accounts': [dict(a.closingState, key=symbols.name(k)) for (k, a) in _accounts.items()]
+  }
+  os.makedirs(_directory, exist_ok=True)
+  filename = os.path.join(_directory, _date + '.json')
+  with open(filename + '.tmp', 'w') as f:
+    json.dump(snapshot, f, indent=1)
+  os.replace(filename + '.tmp', filename)
+  print('Saved account snapshot to %s' % filename)
+
+def loadSnapshot(_before, _directory, _base):
+  # latest snapshot for this base currency taken strictly before the given date
+  for filename in sorted(glob.glob(os.path.join(_directory, '*.json')), reverse=True):
+    with open(filename) as f:
+      snapshot = json.load(f)
+    if snapshot['date'] < _before and snapshot['base'] == _base:
+      print('Resuming from account snapshot %s' % filename)
+      return snapshot
+  return None
+
+class IncrementalState:
+  # --incremental: keeps each account's per-date input digests, monthly
+  # checkpoints and final ledger rows from the previous run so that only
+  # accounts whose inputs changed are reprocessed, and only from the last
+  # checkpoint before the earliest changed date
+  VERSION = 4
+
+  def __init__(self, _directory, _base, _outputFormat, _resumeDate, _processing={}):
+    # _processing: the options that change how accounts are processed; runs
+    # under other settings are not reused
+    self.directory = _directory
+    self.config = {'version': self.VERSION, 'base': _base, 'outputFormat': _outputFormat, 'resumeDate': _resumeDate, 'processing': _processing}
+    self.previous = {}
+    self.current = {}
+    filename = os.path.join(self.directory, 'run.json')
+    if os.path.exists(filename):
+      with open(filename) as f:
+        run = json.load(f)
+      if run['config'] == self.config:
+        self.previous = run['accounts']
+      else:
+        print('DEBUG: run configuration changed since the last incremental run, processing all accounts')
+
+  def _rowsFile(self, _name):
+    return os.path.join(self.directory, _name + '.ablo')
+
+  def digests(self, _account):
+    # a short digest of the account's input transactions for each date
+    digests = []
+    for (d, txs) in itertools.groupby(_account.orderedTXs(), operator.attrgetter('date')):
+      h = hashlib.blake2b(digest_size=8)
+      for tx in txs:
+        h.update(tx.id.encode())
+        h.update(struct.pack('<dd', tx.amount, tx.value))
+      digests.append([d, h.hexdigest()])
+    return digests
+
+  def prepare(self, _key, _account):
+    # returns ('reuse', None), ('replay', fromDate) or ('full', '')
+    name = symbols.name(_key)
+    digests = self.digests(_account)
+    self.current[name] = {'name': _account.name, 'digests': digests}
+    prev = self.previous.get(name)
+    if prev is None or prev['name'] != _account.name or not os.path.exists(self._rowsFile(name)):
+      return ('full', '')
+
+    old = prev['digests']
+    n = 0
+    while n < len(digests) and n < len(old) and digests[n] == old[n]:
+      n += 1
+    (fields, rows) = readLedgerColumns(self._rowsFile(name))
+
+    if n == len(digests) and n == len(old):
+      _account.ledger = [txFromRow(row) for row in rows]
+      for i in prev['disposals']:
+        _account.ledger[i].disposal = True
+      if len(_account.ledger) > 0:
+        _account.earliestDate = _account.ledger[0].date
+        _account.latestDate = _account.ledger[len(_account.ledger) - 1].date
+      _account.checkpoints = prev['checkpoints']
+      _account.closingState = prev['closingState']
+      self.current[name]['reused'] = True
+      return ('reuse', None)
+
+    changed = min(d for (d, h) in digests[n:n + 1] + old[n:n + 1])
+    checkpoints = [c for c in prev['checkpoints'] if c['date'] <= changed]
+    if len(checkpoints) == 0:
+      return ('full', '')
+    _account.resumeFrom(checkpoints[-1], rows, prev['disposals'])
+    _account.checkpoints = checkpoints[:-1] # retaken when processing resumes
+    return ('replay', checkpoints[-1]['date'])
+
+  def save(self, _accounts):
+    os.makedirs(self.directory, exist_ok=True)
+    for (key, a) in _accounts.items():
+      name = symbols.name(key)
+      entry = self.current[name]
+      entry['checkpoints'] = a.checkpoints
+      entry['closingState'] = a.closingState
+      # the rows files have no column for it, so disposals are kept here
+      entry['disposals'] = [i for (i, tx) in enumerate(a.ledger) if tx.disposal]
+      if entry.pop('reused', False): continue
+      writer = FileWriter(name, a.name, a.base, a.currency, 'binary', os.path.join(self.directory, ''))
+      for tx in a.ledger:
+        writer.addline(tx.date, tx.id, tx.value, tx.amount, tx.chargeable, tx.profit)
+      writer.close()
+    filename = os.path.join(self.directory, 'run.json')
+    with open(filename + '.tmp', 'w') as f:
+      json.dump({'config': self.config, 'accounts': self.current}, f)
+    os.replace(filename + '.tmp', filename)
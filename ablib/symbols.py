@@ -0,0 +1,40 @@
+#
+# Interned currency and account names
+#
+
+class SymbolTable:
+  # maps currency and account names to small integer ids at parse time, so
+  # the accounting core can key its dicts on ints; names are only looked up
+  # again for output
+  def __init__(self):
+    self.ids = {}
+    self.names = []
+    self.joined = {}
+
+  def id(self, _name):
+    i = self.ids.get(_name)
+    if i is None:
+      i = len(self.names)
+      self.ids[_name] = i
+      self.names.append(_name)
+    return i
+
+  def name(self, _id):
+    return self.names[_id]
+
+  def pair(self, _id1, _id2):
+    # single int key for an ordered pair of ids
+    return (_id1 << 16) | _id2
+
+  def join(self, _prefix, _id):
+    # id of the concatenated name, e.g. 'poloniex' + 'BTC'
+    key = self.pair(_prefix, _id)
+    i = self.joined.get(key)
+    if i is None:
+      i = self.id(self.names[_prefix] + self.names[_id])
+      self.joined[key] = i
+    return i
+
+# shared by every Ledger in the process: ids only stand in for names, so
+# separate calculations can intern into the same table
+symbols = SymbolTable()
@@ -0,0 +1,109 @@
+#
+# Matching of transfers between accounts seen from both sides
+#
+
+import time
+
+from .symbols import symbols
+
+class transferHandler:
+  def __init__(self):
+    self.transfers = {}
+    self.unmatchedByDate = {}
+    self.matched = {}
+    self.fingerprints = {}
+    self.sourcefiles = {}
+
+  def fingerprint(self, _tx):
+    # create (canonical) fingerprint
+    acc1 = _tx.account1
+    acc2 = _tx.account2
+    amnt = round(_tx.amount2, 5)
+    if amnt < 0:
+      amnt = abs(amnt)
+      acc1 = _tx.account2
+      acc2 = _tx.account1
+    fingerprint = "%f %s -> %s" % (amnt, symbols.name(acc1), symbols.name(acc2))
+    return fingerprint
+
+  def add(self, _tx, _id, _filename):
+    self.transfers[_id] = _tx
+    self.sourcefiles[_id] = _filename
+    # set up 'fuzzy' date matching lookup:
+    # round to day and allow one calendar day either side to match
+    t = float(time.strftime("%s", time.strptime(_tx.date, "%Y-%m-%d-%H-%M")))
+    ts = [
+      time.strftime("%Y-%m-%d", time.gmtime(t)),
+      time.strftime("%Y-%m-%d", time.gmtime(t - 60*60*24)),
+      time.strftime("%Y-%m-%d", time.gmtime(t + 60*60*24))
+    ]
+    fingerprint = self.fingerprint(_tx)
+    self.fingerprints[_id] = fingerprint
+    found = False
+    for t in ts:
+      if t in self.unmatchedByDate:
+        for pid in self.unmatchedByDate[t]:
+          p = self.transfers[pid]
+          if fingerprint == self.fingerprints[pid] and _filename != self.sourcefiles[pid]:
+            self.unmatchedByDate[t].remove(pid)
+            self.matched[pid] = _id
+            self.matched[_id] = pid
+            found = True
+            break
+      if found: break
+    if not found:
+      if ts[0] not in self.unmatchedByDate:
+        self.unmatchedByDate[ts[0]] = []
+      self.unmatchedByDate[ts[0]].append(_id)
+
+  def isMatched(self, _id):
+    return _id in self.matched
+
+  def matchIdOf(self, _id):
+    if self.isMatched(_id):
+      return self.matched[_id]
+    else:
+      return None
+
+  def matchOf(self, _id):
+    if self.isMatched(_id):
+      return self.transfers[self.matchIdOf(_id)]
+    else:
+      return None
+
+  def fingerprintOf(self, _id):
+    if _id in self.transfers:
+      return self.fingerprints[_id]
+    else:
+      return None
+
+  def sourceOf(self, _id):
+    if _id in self.transfers:
+      return self.sourcefiles[_id]
+    else:
+      return None
+
+  def strOf(self, _id):
+    return "%s (%s; %s)" % (self.fingerprints[_id], _id, self.sourcefiles[_id])
+
+  def __str__(self):
+    data = {}
+    for id_ in self.transfers:
+      tx = self.transfers[id_]
+      if tx.date not in data: data[tx.date] = []
+      s = self.strOf(id_)
+      if id_ in self.matched:
+        mid = self.matched[id_]
+        s += " matched with " + self.strOf(mid)
+      else:
+        s = "UNMATCHED: " + s
+      data[tx.date].append(s)
+
+    dates = list(data.keys())
+    dates.sort()
+
+    ss = "Transfers:\n"
+    for d in dates:
+      for f in data[d]:
+        ss += d + " " + f + "\n"
+    return ss
@@ -0,0 +1,37 @@
+#
+# Shared constants and helpers: csv line splitting and date conversion (see
+# also dates.py)
+#
+
+import os
+import time
+import calendar
+import csv
+
+os.environ['TZ'] = 'UTC' # workaround for no inverse of time.gmtime(t)
+TOLERANCE = 1e-6
+FLOAT_ZERO = 1e-8
+
+def extractCSVs(_s, _n, _i):
+  # TODO: pass error up instead of passing line number down
+  line = _s.rstrip().lstrip()
+  if line == '':
+    return []
+  for e in csv.reader([line], quotechar='"', delimiter=',', quoting=csv.QUOTE_ALL, skipinitialspace=True):
+    vs = e
+  if len(vs) != _n:
+    exit('ERROR: Incorrect number of entries on line %d (expecting %d, got %d)' % (_i, _n, len(vs)))
+  return vs
+
+
+dateMinutes = {}
+def dateToMinutes(_date):
+  # %Y-%m-%d-%H-%M -> minutes since the epoch, memoised
+  m = dateMinutes.get(_date)
+  if m is None:
+    m = calendar.timegm(time.strptime(_date, "%Y-%m-%d-%H-%M")) // 60
+    dateMinutes[_date] = m
+  return m
+
+def minutesToDate(_minutes):
+  return time.strftime("%Y-%m-%d-%H-%M", time.gmtime(_minutes * 60))
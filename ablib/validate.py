@@ -0,0 +1,138 @@
+#
+# Validation of the inputs (--validate): every ledger export and bootstrap
+# file is checked and all problems are reported at once, where a normal run
+# stops at the first one. Exports are checked in forked worker processes, one
+# file each. The exit code has a bit set for each kind of problem found.
+#
+
+import os
+import multiprocessing
+
+from .util import extractCSVs, dateToMinutes
+from .dates import dayOrdinal
+from .symbols import symbols
+from .files import readData
+from .parsers import parseFile, errorMessage
+
+# kinds of problems, as exit code bits (1 is left to runs stopped by exit())
+PARSE = 2 # unreadable files and rows
+VALUATION = 4 # rows that cannot be valued in the base for lack of conversions
+CONSISTENCY = 8 # rows and bootstrap entries that read but make no sense
+
+KINDS = {PARSE: 'parse', VALUATION: 'valuation', CONSISTENCY: 'consistency'}
+
+
+class LedgerError:
+  def __init__(self, _kind, _filename, _line, _message):
+    self.kind = _kind
+    self.filename = _filename
+    self.line = _line
+    self.message = _message
+
+  def __str__(self):
+    return '%s:%d: %s error: %s' % (self.filename, self.line, KINDS[self.kind], self.message)
+
+
+def checkRows(_ledger, _filename, _parsed):
+  # consistency and valuation of parsed rows, as the ledger would ingest them
+  errors = []
+  pending = {}
+  for (ln, tx) in _parsed:
+    if tx.date > _ledger.options.end: continue
+    try:
+      # as processing reads it: by day for B&B matching, to the minute for the cache
+      dayOrdinal(tx.date)
+      dateToMinutes(tx.date)
+    except ValueError:
+      errors.append(LedgerError(CONSISTENCY, _filename, ln, 'invalid date "%s"' % tx.date))
+      continue
+    if tx.amount1 * tx.amount2 > 0:
+      errors.append(LedgerError(CONSISTENCY, _filename, ln, 'invalid fund exchange: %s %f <> %s %f' % (symbols.name(tx.curr1), tx.amount1, symbols.name(tx.curr2), tx.amount2)))
+    # the first valuation decides (a second one is in the same currency)
+    (currency, amount, slot) = _ledger.valuationNeeds(tx)[1][0]
+    if currency == _ledger.baseId: continue
+    (dates, amounts, lines) = pending.setdefault(currency, ([], [], []))
+    dates.append(tx.date)
+    amounts.append(amount)
+    lines.append(ln)
+
+  for (currency, (dates, amounts, lines)) in pending.items():
+    values = _ledger.converter.convertMany(dates, currency, _ledger.baseId, amounts)
+    for (date, ln, value) in zip(dates, lines, values):
+      if value is None:
+        errors.append(LedgerError(VALUATION, _filename, ln, 'currency conversion for %s is not available on %s' % (symbols.name(currency), date)))
+  return errors
+
+def parseCollecting(_ledger, _filename, _data=None):
+  # -> (rows that parse, LedgerErrors for those that do not, whether the rows
+  # used the conversion tables); _data: the file's contents, if already read
+  if _data is None:
+    try:
+      _data = readData(_filename)
+    except OSError as e:
+      return ([], [LedgerError(PARSE, _filename, 0, str(e))], False)
+  rowErrors = []
+  (parsed, usesConversions) = parseFile(_data, _ledger.converter, _ledger.base, _filename, rowErrors)
+  return (parsed, [LedgerError(PARSE, _filename, ln, message) for (ln, message) in rowErrors], usesConversions)
+
+def validateFile(_ledger, _filename):
+  (parsed, errors, usesConversions) = parseCollecting(_ledger, _filename)
+  return errors + checkRows(_ledger, _filename, parsed)
+
+def validateAccountsFile(_filename, _base):
+  # bootstrap account states, see Ledger.bootstrapAccounts
+  errors = []
+  with open(_filename) as f:
+    for (i, line) in enumerate(f, 1):
+      try:
+        accountInfo = extractCSVs(line, 5, i)
+        if len(accountInfo) > 0:
+          float(accountInfo[2])
+          float(accountInfo[4])
+      except (SystemExit, ValueError) as e:
+        errors.append(LedgerError(PARSE, _filename, i, errorMessage(e)))
+        continue
+      if len(accountInfo) > 0 and accountInfo[3] != _base:
+        errors.append(LedgerError(CONSISTENCY, _filename, i, 'invalid base currency %s for account (expecting %s)' % (accountInfo[3], _base)))
+  return errors
+
+
+validateWorkerState = None
+
+def initValidateWorker(_ledger):
+  global validateWorkerState
+  validateWorkerState = _ledger # inherited through fork, not pickled
+
+def validateWorker(_filename):
+  return validateFile(validateWorkerState, _filename)
+
+def validateInputs(_ledger, _jobs=0):
+  # -> LedgerErrors of the bootstrap files and exports, in input order
+  errors = []
+  for filename in _ledger.accountsFiles:
+    errors += validateAccountsFile(filename, _ledger.base)
+  workers = min(_jobs or os.cpu_count() or 1, len(_ledger.inputs))
+  if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+    with multiprocessing.get_context('fork').Pool(workers, initValidateWorker, (_ledger,)) as pool:
+      for fileErrors in pool.imap(validateWorker, _ledger.inputs):
+        errors += fileErrors
+  else:
+    for filename in _ledger.inputs:
+      errors += validateFile(_ledger, filename)
+  return errors
+
+def exitCode(_errors):
+  code = 0
+  for e in _errors:
+    code |= e.kind
+  return code
+
+def errorReport(_errors, _files):
+  # files in input order, each file's errors by line
+  files = {}
+  for e in _errors:
+    files.setdefault(e.filename, len(files))
+  lines = [str(e) for e in sorted(_errors, key=lambda e: (files[e.filename], e.line))]
+  counts = ['%d %s' % (sum(e.kind == kind for e in _errors), name) for (kind, name) in sorted(KINDS.items())]
+  lines.append('%s error(s) in %d file(s)' % (', '.join(counts), _files))
+  return '\n'.join(lines)
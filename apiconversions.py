@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+#
+# Convert market data api downloads (see conversions/workdir/*.sh) to
+# conversion files, one per currency pair:
+#   cryptocompare (.csjson): cc<FROM><TO>.csv for each to-currency in the file
+#   cryptowat (.json):       cryptowat<FROM><TO>.csv, currencies given by -f/-t
+#
+# Inputs may be compressed (see ablib.files) and are read as a stream
+
+import os
+import sys
+import glob
+import argparse
+
+from ablib.files import stripCompression
+from ablib.marketdata import cryptocompareSeries, cryptowatSeries, writeConversionCSV
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-i", "--input", help="file(s) to read", nargs="+", default=["*.csjson"])
+parser.add_argument("-o", "--output", help="directory for the conversion files", default=".")
+parser.add_argument("-r", "--format", help="cryptocompare or cryptowat, by default from the file extension", default="fromFileExt")
+parser.add_argument("-f", "--fromCurrency", help="from currency (cryptowat)", default="")
+parser.add_argument("-t", "--toCurrency", help="to currency (cryptowat)", default="")
+args = parser.parse_args()
+
+inputs = [f for i in args.input for f in glob.glob(i)]
+if len(inputs) == 0:
+  sys.exit('need input file(s)')
+
+formats = {'.csjson': 'cryptocompare', '.json': 'cryptowat'}
+
+for filename in inputs:
+  frmat = args.format
+  if frmat == 'fromFileExt':
+    frmat = formats.get(os.path.splitext(stripCompression(filename))[1], '')
+  print("Reading '%s' (%s) ..." % (filename, frmat))
+
+  if frmat == 'cryptocompare':
+    (prefix, series) = ('cc', cryptocompareSeries(filename))
+  elif frmat == 'cryptowat':
+    if args.fromCurrency == '' or args.toCurrency == '':
+      sys.exit('ERROR: cryptowat files need the --fromCurrency and --toCurrency options')
+    (prefix, series) = ('cryptowat', cryptowatSeries(filename, args.fromCurrency, args.toCurrency))
+  else:
+    sys.exit('ERROR: unknown format "%s" of %s' % (frmat, filename))
+
+  for ((fromCurrency, toCurrency), s) in sorted(series.items()):
+    output = os.path.join(args.output, prefix + fromCurrency + toCurrency + '.csv')
+    print('Writing %d rates to %s' % (len(s[0]), output))
+    writeConversionCSV(output, fromCurrency, toCurrency, s)
@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+#
+# Compare the throughput of the float and fixed point (--fixed-point) account
+# engines on a synthetic trading history of a single asset
+#
+# prints, per mode: rows processed, best time of the repeats, rows per second
+# and the resulting chargeable gain
+#
+
+import argparse
+import random
+import time
+
+from ablib import Account, TX, FixedPointAccount, FixedPointTX, symbols, dateToMinutes, minutesToDate
+
+parser = argparse.ArgumentParser()
+
+parser.add_argument("-n", "--rows", help="number of trades", type=int, default=100000)
+parser.add_argument("-d", "--days", help="length of the history in days", type=int, default=3 * 365)
+parser.add_argument("-r", "--repeat", help="runs per mode, the best is reported", type=int, default=3)
+parser.add_argument("--seed", help="random seed for the history", type=int, default=1)
+
+args = parser.parse_args()
+
+
+def history(_rows, _days, _seed):
+  # (date, amount, value) trades: a random walk of the price, with sells
+  # clustered near buys so that both "bed and breakfast" matching and the
+  # Section 104 pool are exercised
+  rng = random.Random(_seed)
+  start = dateToMinutes('2015-01-01-00-00')
+  minutes = sorted(start + rng.randrange(_days * 24 * 60) for i in range(_rows))
+  price = 300.0
+  balance = 0.0
+  trades = []
+  for m in minutes:
+    price = max(1.0, price * (1.0 + rng.gauss(0.0, 0.002)))
+    amount = round(rng.uniform(0.001, 2.0), 8)
+    if balance > amount and rng.random() < 0.45:
+      amount = -amount
+    balance += amount
+    trades.append((minutesToDate(m), amount, round(abs(amount) * price, 2)))
+  return trades
+
+def run(_accountClass, _txClass, _trades):
+  (btc, gbp) = (symbols.id('BTC'), symbols.id('GBP'))
+  account = _accountClass(btc, btc, gbp)
+  for (i, (date, amount, value)) in enumerate(_trades):
+    account.addTX(_txClass(amount, value, date, str(i)))
+  start = time.perf_counter()
+  account.process()
+  return (time.perf_counter() - start, account.chargeable)
+
+
+trades = history(args.rows, args.days, args.seed)
+
+print("Mode, \tRows, \tSeconds, \tRows/s, \tChargeable")
+for (mode, accountClass, txClass) in (('float', Account, TX), ('fixed', FixedPointAccount, FixedPointTX)):
+  results = [run(accountClass, txClass, trades) for i in range(args.repeat)]
+  (seconds, chargeable) = min(results)
+  print('%s,\t%d,\t%f,\t%.0f,\t%f' % (mode, len(trades), seconds, len(trades) / seconds, chargeable))
@@ -1,5 +1,6 @@
 #!/bin/bash
 
-./kraken2transfers.py
-./polo2transfers.py
+# exchange deposit/withdrawal exports are read directly from ledgers/, named
+# with their account prefix: poloniex.depositHistory.csv,
+# poloniex.withdrawalHistory.csv and kraken.ledgers.csv
 ./abledger.py -a ledgers/accounts2015-2016.dat -i "ledgers/*.csv" -c "conversions/*.csv" -s 2015-04-06-00-05 -e 2016-04-05-23-55
@@ -3,6 +3,13 @@
 #ln -s ../../ledgers/poloniex.csv markets.poloniex.krkn
 #ln -s ../../ledgers/kraken.csv markets.kraken.krkn
 
+# refresh the api downloads (only missing days are fetched), then convert them
+#./fetch.py cryptocompare -f ETH -t BTC,USD,EUR
+#./fetch.py cryptocompare -f ETC -t BTC,USD,EUR
+#./fetch.py cryptowat -m poloniex -f ETC -t BTC
+#./fetch.py kraken -p XETHXXBT -f ETH -t BTC
+#./apiconversions.py -i 'conversions/workdir/*.csjson' -o conversions/workdir
+
 ./conversions.py -i 'conversions/workdir/*EUR.raw' -o conversions/workdir/BTCEUR.csv -f BTC -t EUR -s 2014-01-01-00-00 
 ./conversions.py -i 'conversions/workdir/*USD.raw' -o conversions/workdir/BTCUSD.csv -f BTC -t USD -s 2014-01-01-00-00
 ./conversions.py -i conversions/workdir/googleEURGBP.dat -o conversions/EURGBP.csv -f EUR -t GBP -s 2014-01-01-00-00 
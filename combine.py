@@ -8,11 +8,15 @@
 # date, rate
 # date, rate
 # ...
+#
+# Inputs may be gzip, xz or zstandard compressed
 
 import sys
 import argparse
 import re
 
+from ablib.files import openLines
+
 def extractCSVs(s):
   return re.sub('\s*,\s*', ',', line.rstrip()).split(',')
 
@@ -34,8 +38,8 @@ for (n, o) in ordinals:
   if filename != '':
     print('Reading %s ...' % (filename))
     fileCount += 1
-    f = open(filename)
-    line = f.readline()
+    f = openLines(filename)
+    line = next(f)
     (fcurr, tcurr) = extractCSVs(line)
     if n == 1:
       currencies.append(fcurr)
@@ -12,6 +12,9 @@
 #
 # First line of input 'csv' and 'dat' files is ignored
 #
+# Inputs may be gzip, xz or zstandard compressed (e.g. trades.raw.gz), the
+# format is then told by the extension before the compression suffix
+#
 # Formats:
 #   --format raw => one entry per line: unix-time, price, volume
 #   --format csv => one entry per line: %Y-%m-%d-%h-%m, price
@@ -26,6 +29,8 @@ import glob
 import re
 import math
 
+from ablib.files import openLines, stripCompression
+
 os.environ['TZ'] = 'UTC' # workaround for no inverse of time.gmtime(t) 
 
 parser = argparse.ArgumentParser()
@@ -158,11 +163,11 @@ endNum = timestr2timenum(args.end)
 
 for filename in inputs:
   print('Reading %s ...' % (filename))
-  f = open(filename)
+  f = openLines(filename)
 
   frmat = args.format
   if frmat == 'fromFileExt':
-    frmat = re.sub('.*\.', '', filename)
+    frmat = re.sub('.*\.', '', stripCompression(filename))
 
   weight = None
   if len(weights) > 0:
@@ -172,7 +177,7 @@ for filename in inputs:
   processor = LineReader(frmat, weight)
 
   if frmat == 'csv' or frmat == 'dat' or frmat == 'polo' or frmat == 'krkn':
-    f.readline() # ignore first line
+    next(f, None) # ignore first line
 
   for line in f:
     if not processor.check(line): continue
@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+#
+# Download or refresh market data for the conversion pipeline (see
+# apiconversions.py and conversions.py); an existing download file is
+# brought up to date, fetching only what it is missing:
+#   ./fetch.py cryptocompare -f ETH -t BTC,USD,EUR    -> ETHBTCUSDEUR.csjson
+#   ./fetch.py cryptowat -m poloniex -f ETC -t BTC    -> cryptowat.poloniexETCBTC.json
+#   ./fetch.py kraken -p XETHXXBT -f ETH -t BTC       -> krakenETHBTC.csv
+#
+# --mirror keeps every api response in a directory, and --offline answers
+# from such a directory (or --url from a local stand-in server) instead of
+# the api, for reproducible runs
+
+import os
+import sys
+import time
+import argparse
+
+from ablib import minutesToDate
+from ablib.fetch import Fetcher, HTTPTransport, DirectoryTransport, CryptocompareSource, CryptowatSource, KrakenSource
+
+parser = argparse.ArgumentParser()
+parser.add_argument("source", help="cryptocompare, cryptowat or kraken")
+parser.add_argument("-f", "--fromCurrency", help="from currency", required=True)
+parser.add_argument("-t", "--toCurrency", help="to currency (comma separated list for cryptocompare)", required=True)
+parser.add_argument("-m", "--market", help="exchange (cryptowat)", default="poloniex")
+parser.add_argument("-p", "--pair", help="pair name (kraken), e.g. XETHXXBT", default="")
+parser.add_argument("-s", "--start", help="start date (YYYY-MM-DD-HH-MM)", default="2014-01-01-00-00")
+parser.add_argument("-e", "--end", help="end date (YYYY-MM-DD-HH-MM), by default now", default="")
+parser.add_argument("-d", "--directory", help="directory of the download file", default="conversions/workdir")
+parser.add_argument("-r", "--rate", help="requests per second", type=float, default=1.0)
+parser.add_argument("-j", "--jobs", help="concurrent requests", type=int, default=4)
+parser.add_argument("--url", help="api base url, e.g. of a local stand-in server", default="")
+parser.add_argument("--mirror", help="also keep the api responses in this directory", default="")
+parser.add_argument("--offline", help="answer requests from this mirror directory", default="")
+args = parser.parse_args()
+
+if args.source == 'cryptocompare':
+  source = CryptocompareSource(args.fromCurrency, args.toCurrency.split(','))
+elif args.source == 'cryptowat':
+  source = CryptowatSource(args.market, args.fromCurrency, args.toCurrency)
+elif args.source == 'kraken':
+  if args.pair == '':
+    sys.exit('ERROR: kraken needs the --pair option')
+  source = KrakenSource(args.pair, args.fromCurrency, args.toCurrency)
+else:
+  sys.exit('ERROR: unknown source "%s"' % args.source)
+
+if args.offline != '':
+  transport = DirectoryTransport(args.offline)
+else:
+  transport = HTTPTransport(args.url or source.baseURL, args.mirror)
+
+end = args.end or minutesToDate(int(time.time()) // 60)
+filename = os.path.join(args.directory, source.filename())
+print('Updating %s from %s to %s ...' % (filename, args.start, end))
+try:
+  requests = source.update(Fetcher(transport, args.rate, args.jobs), filename, args.start, end)
+except (OSError, ValueError) as e: # the file keeps what was fetched before
+  sys.exit('ERROR: fetching for %s failed: %s' % (filename, e))
+print('%d request(s) made' % requests)
@@ -0,0 +1,52 @@
+#
+# Shared test inputs: a small kraken export with its conversion table, and
+# Ledger options reading them from a temporary directory
+#
+
+import os
+import random
+import datetime
+
+START = datetime.datetime(2016, 1, 1)
+HOURS = 24 * 120
+
+def writeInputs(_directory, _seed=3):
+  # hourly BTC rates, and a kraken export of GBP <-> BTC and BTC <-> ETH
+  # trades with amounts that are not whole pence
+  rnd = random.Random(_seed)
+  os.makedirs(os.path.join(_directory, 'conversions'))
+  os.makedirs(os.path.join(_directory, 'ledgers'))
+  with open(os.path.join(_directory, 'conversions', 'BTCGBP.csv'), 'w') as f:
+    f.write('BTC, GBP\n')
+    for h in range(HOURS):
+      date = START + datetime.timedelta(hours=h)
+      f.write('%s, %f\n' % (date.strftime('%Y-%m-%d-%H-%M'), 300 + h * 0.05 + rnd.random() * 3))
+  rows = 0
+  with open(os.path.join(_directory, 'ledgers', 'kraken.csv'), 'w') as f:
+    f.write('Date, From-Currency, Amount, To-Currency, Value\n')
+    for i in range(80):
+      date = (START + datetime.timedelta(hours=rnd.randrange(HOURS - 240))).strftime('%d/%m/%Y %H:00:00')
+      gbp = round(rnd.uniform(10, 500), 6)
+      btc = round(gbp / 320 * rnd.uniform(0.97, 1.03), 8)
+      kind = rnd.random()
+      if kind < 0.4:
+        f.write('%s, GBP, %f, BTC, %.8f\n' % (date, -gbp, btc))
+      elif kind < 0.8:
+        f.write('%s, BTC, %.8f, GBP, %f\n' % (date, -btc, gbp))
+      else:
+        f.write('%s, BTC, %.8f, ETH, %.8f\n' % (date, -btc, btc * 80))
+      rows += 1
+  return rows
+
+def ledgerOptions(_directory, **_overrides):
+  options = {
+    'input': os.path.join(_directory, 'ledgers', '*.csv'),
+    'conversion': os.path.join(_directory, 'conversions', '*.csv'),
+    'accounts': os.path.join(_directory, 'none'),
+    'cache': '',
+    'output': os.path.join(_directory, 'output'),
+    'snapshots': os.path.join(_directory, 'snapshots'),
+    'jobs': 1
+  }
+  os.makedirs(options['output'], exist_ok=True)
+  return dict(options, **_overrides)
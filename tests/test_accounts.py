@@ -0,0 +1,53 @@
+#
+# Account input order: txs kept in sorted runs as they are added, and merged
+# into processing order
+#
+
+import random
+import unittest
+
+from ablib import Account, TX, symbols
+
+
+def newAccount():
+  (btc, gbp) = (symbols.id('BTC'), symbols.id('GBP'))
+  return Account(btc, btc, gbp, _outputDirectory='')
+
+def day(_i):
+  return '2016-03-%02d-12-00' % _i
+
+
+class SortedRunsTest(unittest.TestCase):
+  def assertProcessingOrder(self, _account, _added):
+    # by date, each date's sells before its buys, otherwise as added
+    expected = sorted(_added, key=lambda tx: (tx.date, tx.amount >= 0))
+    self.assertEqual([tx.id for tx in _account.orderedTXs()], [tx.id for tx in expected])
+
+  def test_exports_in_either_order_make_one_run_each(self):
+    account = newAccount()
+    added = [TX(1.0, 300.0, day(i), 'up%d' % i) for i in range(1, 11)]
+    added += [TX(-0.5, 150.0, day(i), 'down%d' % i) for i in range(20, 4, -1)]
+    for tx in added:
+      account.addTX(tx)
+    self.assertEqual(len(account.runs), 2)
+    self.assertProcessingOrder(account, added)
+
+  def test_sells_before_buys_on_a_date(self):
+    account = newAccount()
+    added = [TX(1.0, 300.0, day(1), 'buy1'), TX(-0.5, 150.0, day(1), 'sell1'), TX(2.0, 600.0, day(1), 'buy2'), TX(-0.1, 30.0, day(1), 'sell2')]
+    for tx in added:
+      account.addTX(tx)
+    self.assertEqual([tx.id for tx in account.orderedTXs()], ['sell1', 'sell2', 'buy1', 'buy2'])
+
+  def test_shuffled_input(self):
+    rnd = random.Random(5)
+    account = newAccount()
+    added = [TX(rnd.choice((1.0, -1.0)), 300.0, day(rnd.randrange(1, 29)), str(i)) for i in range(200)]
+    for tx in added:
+      account.addTX(tx)
+    self.assertGreater(len(account.runs), 1)
+    self.assertProcessingOrder(account, added)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,60 @@
+#
+# Parsed ledger files are read back from the cache until the file, the
+# parser version or the base currency changes
+#
+
+import os
+import unittest
+import tempfile
+from unittest import mock
+
+import ablib.cache
+from ablib import Ledger
+from inputs import writeInputs, ledgerOptions
+
+
+class LedgerCacheTest(unittest.TestCase):
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    writeInputs(self.directory.name)
+    self.cache = os.path.join(self.directory.name, 'cache')
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def parse(self, **_options):
+    # -> [(filename, parsed rows, whether they came from the cache)]
+    ledger = Ledger(**ledgerOptions(self.directory.name, cache=self.cache, **_options))
+    return list(ledger.parseInputs())
+
+  def test_second_parse_hits(self):
+    first = self.parse()
+    second = self.parse()
+    self.assertEqual([fromCache for (filename, parsed, fromCache) in first], [False])
+    self.assertEqual([fromCache for (filename, parsed, fromCache) in second], [True])
+    rows = lambda parsed: [(ln, str(tx)) for (ln, tx) in parsed]
+    self.assertEqual(rows(second[0][1]), rows(first[0][1]))
+
+  def test_changed_file_misses(self):
+    self.parse()
+    with open(os.path.join(self.directory.name, 'ledgers', 'kraken.csv'), 'a') as f:
+      f.write('01/05/2016 12:00:00, GBP, -10.000000, BTC, 0.03000000\n')
+    (filename, parsed, fromCache) = self.parse()[0]
+    self.assertFalse(fromCache)
+    self.assertEqual(parsed[-1][1].date, '2016-05-01-12-00')
+
+  def test_parser_version_change_misses(self):
+    self.parse()
+    with mock.patch.object(ablib.cache, 'PARSER_VERSION', ablib.cache.PARSER_VERSION + 1):
+      self.assertFalse(self.parse()[0][2])
+    self.assertTrue(self.parse()[0][2])
+
+  def test_base_change_misses(self):
+    self.parse()
+    self.assertFalse(self.parse(base='EUR')[0][2])
+    self.assertTrue(self.parse(base='EUR')[0][2])
+    self.assertTrue(self.parse()[0][2])
+
+
+if __name__ == '__main__':
+  unittest.main()
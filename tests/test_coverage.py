@@ -0,0 +1,80 @@
+#
+# Conversion table coverage: covered hour ranges and the hours missing
+#
+
+import os
+import io
+import unittest
+import tempfile
+import contextlib
+
+from ablib import Ledger
+from ablib.coverage import Coverage, hourOf, dateOfHour, coverageReport
+from ablib.validate import PARSE
+from inputs import writeInputs, ledgerOptions
+
+
+def hourly(_day, _hours):
+  return ['%s-%02d-00' % (_day, h) for h in _hours]
+
+
+class CoverageTest(unittest.TestCase):
+  def setUp(self):
+    # 2016-02-28 whole, the leap day from 06:00 to 09:00 and 20:00 on, and
+    # 2016-03-02 whole; 2016-03-01 has no rates at all
+    dates = hourly('2016-02-28', range(24)) + hourly('2016-02-29', list(range(6, 10)) + list(range(20, 24))) + hourly('2016-03-02', range(24))
+    self.coverage = Coverage(dates[::-1]) # the table's order does not matter
+
+  def test_hours(self):
+    for date in ('2016-02-29-23-59', '2016-03-01-00-00', '2016-12-31-23-00'):
+      self.assertEqual(dateOfHour(hourOf(date)), date[:13] + '-00')
+    self.assertEqual(hourOf('2016-03-01-00-00') - hourOf('2016-02-28-23-00'), 25)
+
+  def test_ranges(self):
+    self.assertEqual(len(self.coverage), 4)
+    self.assertEqual([(dateOfHour(a), dateOfHour(b)) for (a, b) in self.coverage.gaps()], [
+      ('2016-02-29-00-00', '2016-02-29-05-00'),
+      ('2016-02-29-10-00', '2016-02-29-19-00'),
+      ('2016-03-01-00-00', '2016-03-01-23-00')])
+    self.assertEqual(self.coverage.gaps()[0][0], hourOf('2016-02-29-00-00'))
+    self.assertTrue(self.coverage.covers(hourOf('2016-02-29-09-30')))
+    self.assertFalse(self.coverage.covers(hourOf('2016-02-29-10-00')))
+
+  def test_missing(self):
+    hours = [hourOf(d) for d in ('2016-03-03-00-00', '2016-02-28-05-00', '2016-02-29-12-00', '2016-02-27-23-00', '2016-02-29-20-00', '2016-03-01-07-00', '2016-02-29-12-30')]
+    missing = self.coverage.missing(hours)
+    self.assertEqual([dateOfHour(h) for h in missing], ['2016-02-27-23-00', '2016-02-29-12-00', '2016-02-29-12-00', '2016-03-01-07-00', '2016-03-03-00-00'])
+
+  def test_report(self):
+    missing = {'ETH': [hourOf('2016-03-01-%02d-00' % h) for h in (1, 2, 3, 7)]}
+    self.assertEqual(coverageReport(missing, 'GBP').split('\n'), [
+      'ETH -> GBP: 4 hour(s) missing in 2 range(s)',
+      '  2016-03-01-01-00 to 2016-03-01-03-00 (3 hours)',
+      '  2016-03-01-07-00'])
+    self.assertEqual(coverageReport({}, 'GBP'), 'All valuations are covered by the conversion tables')
+
+
+class CheckCoverageTest(unittest.TestCase):
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    writeInputs(self.directory.name)
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def test_files_with_bad_rows_are_checked(self):
+    # the BTC table ends in April 2016
+    with open(os.path.join(self.directory.name, 'ledgers', 'kraken.late.csv'), 'w') as f:
+      f.write('Date, From-Currency, Amount, To-Currency, Value\n')
+      f.write('01/02/2016 12:00:00, GBP, -10.0, BTC\n')
+      f.write('01/01/2017 12:00:00, BTC, -0.1, ETH, 8.0\n')
+    options = ledgerOptions(self.directory.name, cache=os.path.join(self.directory.name, 'cache'))
+    for run in range(2): # the partly parsed file is not cached
+      with contextlib.redirect_stdout(io.StringIO()):
+        (missing, errors) = Ledger(**options).checkCoverage()
+      self.assertEqual(missing, {'BTC': [hourOf('2017-01-01-12-00')]})
+      self.assertEqual([(os.path.basename(e.filename), e.line, e.kind) for e in errors], [('kraken.late.csv', 2, PARSE)])
+
+
+if __name__ == '__main__':
+  unittest.main()
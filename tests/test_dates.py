@@ -0,0 +1,47 @@
+#
+# Day counts and UK tax years across leap years
+#
+
+import unittest
+
+from ablib.dates import dayOrdinal, numberDaysBetween, daysUntil, taxYearOf, taxYearBounds
+
+
+class LeapYearTest(unittest.TestCase):
+  def test_days_across_february(self):
+    self.assertEqual(numberDaysBetween('2016-02-28-12-00', '2016-03-01-00-00'), 2)
+    self.assertEqual(numberDaysBetween('2015-02-28-12-00', '2015-03-01-00-00'), 1)
+    self.assertEqual(numberDaysBetween('2000-02-28-00-00', '2000-03-01-00-00'), 2)
+    self.assertEqual(numberDaysBetween('1900-02-28-00-00', '1900-03-01-00-00'), 1)
+    self.assertEqual(numberDaysBetween('2016-03-01-00-00', '2016-02-28-00-00'), -2)
+
+  def test_invalid_dates(self):
+    for date in ('2015-02-29-00-00', '1900-02-29-00-00', '2016-13-01-00-00', 'yesterday'):
+      with self.assertRaises(ValueError):
+        dayOrdinal(date)
+
+  def test_days_until(self):
+    # a 30 day B&B window from the leap day
+    self.assertEqual(list(daysUntil(['2016-02-29-10-00', '2016-02-28-10-00', '2016-03-30-00-00'], '2016-03-30-23-59')), [30, 31, 0])
+
+
+class TaxYearTest(unittest.TestCase):
+  def test_bounds(self):
+    self.assertEqual(taxYearBounds(2015), ('2015-04-06-00-00', '2016-04-05-23-59'))
+    self.assertEqual(taxYearBounds(1999), ('1999-04-06-00-00', '2000-04-05-23-59'))
+
+  def test_year_of_boundary_dates(self):
+    for (date, year) in (('2016-04-05-23-59', 2015), ('2016-04-06-00-00', 2016), ('2016-02-29-12-00', 2015), ('2020-02-29-00-00', 2019), ('2016-01-01-00-00', 2015), ('2016-12-31-23-59', 2016)):
+      self.assertEqual(taxYearOf(date), year, date)
+
+  def test_bounds_agree_with_year_of(self):
+    for year in range(1999, 2026):
+      (start, end) = taxYearBounds(year)
+      self.assertEqual((taxYearOf(start), taxYearOf(end)), (year, year))
+      # the tax years with a 29 February in them are a day longer
+      leap = (year + 1) % 4 == 0 and ((year + 1) % 100 != 0 or (year + 1) % 400 == 0)
+      self.assertEqual(dayOrdinal(end) - dayOrdinal(start) + 1, 365 + leap, year)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,74 @@
+#
+# Rows repeated in overlapping exports of the same exchange are read once
+#
+
+import os
+import io
+import unittest
+import tempfile
+import contextlib
+
+from ablib import Ledger
+from inputs import writeInputs, ledgerOptions
+
+KRAKEN_HEADER = '"txid","ordertxid","pair","time","type","ordertype","price","cost","fee","vol","margin","misc","ledgers"\n'
+
+def krakenTrade(_i):
+  # a buy of 0.1 BTC (and a sell, every third one) on day _i of February
+  type_ = ('buy', 'sell')[_i % 3 == 0]
+  return '"T%d","O%d","XXBTZGBP","2016-02-%02d 12:00:00.5","%s","limit","320.0","32.0","0.05","0.1","0","",""\n' % (_i, _i, _i, type_)
+
+def basicTrade(_i):
+  return '%02d/02/2016 12:00:00, GBP, -32.000000, BTC, 0.10000000\n' % _i
+
+
+class DedupTest(unittest.TestCase):
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    writeInputs(self.directory.name) # for its conversion table
+    self.exports = os.path.join(self.directory.name, 'exports')
+    os.makedirs(self.exports)
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def writeExport(self, _name, _header, _rows):
+    with open(os.path.join(self.exports, _name), 'w') as f:
+      f.write(_header + ''.join(_rows))
+
+  def balances(self, **_options):
+    # -> ({account name: balance}, stdout)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+      (rows, total) = Ledger(**ledgerOptions(self.directory.name, input=os.path.join(self.exports, '*.csv'), **_options)).evaluate()
+    return ({row['name']: row['balance'] for row in rows}, out.getvalue())
+
+  def test_overlapping_exports(self):
+    self.writeExport('kraken.all.csv', KRAKEN_HEADER, [krakenTrade(i) for i in range(1, 10)])
+    (expected, out) = self.balances()
+    os.remove(os.path.join(self.exports, 'kraken.all.csv'))
+    self.writeExport('kraken.a.csv', KRAKEN_HEADER, [krakenTrade(i) for i in range(1, 7)])
+    self.writeExport('kraken.b.csv', KRAKEN_HEADER, [krakenTrade(i) for i in range(4, 10)])
+    (balances, out) = self.balances()
+    for name in ('krakenBTC', 'krakenGBP'):
+      self.assertAlmostEqual(balances[name], expected[name], places=6, msg=name)
+    # whichever file is read second loses its three overlapping rows
+    self.assertEqual(out.count('WARNING: 3 row(s) of '), 1)
+    self.assertEqual(out.count('already read from another file, left out:'), 3)
+    # --keep-duplicates
+    (balances, out) = self.balances(dedup=False)
+    self.assertAlmostEqual(balances['krakenBTC'], expected['krakenBTC'] + 0.1, places=6)
+
+  def test_rows_without_ids_only_matched_on_request(self):
+    self.writeExport('kraken.a.csv', 'Date, From-Currency, Amount, To-Currency, Value\n', [basicTrade(i) for i in (1, 2, 2)])
+    self.writeExport('kraken.b.csv', 'Date, From-Currency, Amount, To-Currency, Value\n', [basicTrade(i) for i in (2, 3)])
+    (balances, out) = self.balances()
+    self.assertAlmostEqual(balances['krakenBTC'], 0.5, places=6)
+    self.assertNotIn('already read from another file', out)
+    # --dedup-content: the repeated row of kraken.a.csv is kept, one match
+    (balances, out) = self.balances(dedup_content=True)
+    self.assertAlmostEqual(balances['krakenBTC'], 0.4, places=6)
+
+
+if __name__ == '__main__':
+  unittest.main()
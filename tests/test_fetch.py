@@ -0,0 +1,66 @@
+#
+# Fetched market data read back into conversion series
+#
+
+import os
+import unittest
+import tempfile
+import urllib.parse
+
+from ablib import dateToMinutes
+from ablib.fetch import Fetcher, DirectoryTransport, CryptocompareSource, mirrorPath
+from ablib.marketdata import cryptocompareSeries
+
+DAY = 24 * 60
+
+def minutesOf(_date):
+  # '%Y-%m-%d %H:%M' in local time, as the cryptocompare reader takes it
+  return dateToMinutes(_date.replace(' ', '-').replace(':', '-'))
+
+
+class CryptocompareAppendTest(unittest.TestCase):
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    self.mirror = os.path.join(self.directory.name, 'mirror')
+    os.makedirs(self.mirror)
+    self.filename = os.path.join(self.directory.name, 'BTCUSDEUR.csjson')
+    # a download as the api gives it, newest first, ending in a zero price
+    with open(self.filename, 'w') as f:
+      f.write('2017-02-09 12:00,{"BTC":{"USD":990.0,"EUR":925.0}}\n')
+      f.write('2017-02-08 12:00,{"BTC":{"USD":1050.0,"EUR":980.0}}\n')
+      f.write('2017-02-07 12:00,{"BTC":{"USD":1020.0,"EUR":0}}\n')
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def mirrorResponse(self, _date, _response):
+    query = urllib.parse.urlencode({'fsym': 'BTC', 'tsyms': 'USD,EUR', 'ts': dateToMinutes(_date) * 60})
+    with open(mirrorPath(self.mirror, '/data/pricehistorical?' + query), 'w') as f:
+      f.write(_response)
+
+  def test_appended_days_are_read(self):
+    self.mirrorResponse('2017-02-10-12-00', '{"BTC":{"USD":1000.0,"EUR":940.0}}')
+    self.mirrorResponse('2017-02-11-12-00', '{"BTC":{"USD":1010.0,"EUR":950.0}}')
+    source = CryptocompareSource('BTC', ['USD', 'EUR'])
+    requests = source.update(Fetcher(DirectoryTransport(self.mirror), 0, 2), self.filename, '2017-02-07-00-00', '2017-02-11-23-59')
+    self.assertEqual(requests, 2)
+
+    series = cryptocompareSeries(self.filename)
+    (dates, rates) = series[('BTC', 'USD')]
+    self.assertEqual(list(dates), [minutesOf('2017-02-%02d 12:00' % d) for d in range(7, 12)])
+    self.assertEqual(list(rates), [1020.0, 1050.0, 990.0, 1000.0, 1010.0])
+    # the zero price is left out, the days after it are kept
+    (dates, rates) = series[('BTC', 'EUR')]
+    self.assertEqual(list(dates), [minutesOf('2017-02-%02d 12:00' % d) for d in range(8, 12)])
+    self.assertEqual(list(rates), [980.0, 925.0, 940.0, 950.0])
+
+  def test_update_fetches_only_missing_days(self):
+    self.mirrorResponse('2017-02-10-12-00', '{"BTC":{"USD":1000.0,"EUR":940.0}}')
+    source = CryptocompareSource('BTC', ['USD', 'EUR'])
+    fetcher = Fetcher(DirectoryTransport(self.mirror), 0, 2)
+    self.assertEqual(source.update(fetcher, self.filename, '2017-02-07-00-00', '2017-02-10-23-59'), 1)
+    self.assertEqual(source.update(fetcher, self.filename, '2017-02-07-00-00', '2017-02-10-23-59'), 0)
+
+
+if __name__ == '__main__':
+  unittest.main()
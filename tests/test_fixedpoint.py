@@ -0,0 +1,61 @@
+#
+# Fixed point runs agree with float runs, to the rounding of values to pence
+#
+
+import os
+import unittest
+import tempfile
+
+from ablib import Ledger, Account, TX, FixedPointAccount, FixedPointTX, symbols
+from inputs import writeInputs, ledgerOptions
+
+
+class FixedPointTotalsTest(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    cls.directory = tempfile.TemporaryDirectory()
+    d = cls.directory.name
+    cls.rows = writeInputs(d)
+    options = ledgerOptions(d)
+    cls.float = Ledger(**options).evaluate()
+    cls.fixed = Ledger(fixed_point=True, **options).evaluate()
+
+  @classmethod
+  def tearDownClass(cls):
+    cls.directory.cleanup()
+
+  def test_totals_match(self):
+    (floatTotal, fixedTotal) = (self.float[1], self.fixed[1])
+    self.assertEqual(fixedTotal['disposals'], floatTotal['disposals'])
+    for k in ('cost', 'profit', 'proceeds', 'chargeable'):
+      self.assertAlmostEqual(fixedTotal[k], floatTotal[k], delta=0.01 * self.rows, msg=k)
+
+  def test_base_currency_accounts_make_no_gains(self):
+    for (rows, total) in (self.float, self.fixed):
+      for row in rows:
+        if row['name'] in ('GBP', 'krakenGBP'):
+          self.assertEqual((row['profit'], row['chargeable'], row['disposals']), (0, 0, 0), row['name'])
+      self.assertIn('krakenGBP', [row['name'] for row in rows])
+
+
+class ZeroGainDisposalTest(unittest.TestCase):
+  # disposals at cost, from the pool and matched with a later acquisition,
+  # are disposals all the same
+  def proceeds(self, _accountClass, _txClass):
+    (btc, gbp) = (symbols.id('BTC'), symbols.id('GBP'))
+    account = _accountClass(btc, btc, gbp, _outputDirectory='')
+    account.addTX(_txClass(1.0, 100.0, '2017-01-01-12-00', 'buy'))
+    account.addTX(_txClass(-0.5, -50.0, '2017-03-01-12-00', 'pooled'))
+    account.addTX(_txClass(-0.2, -30.0, '2017-04-01-12-00', 'matched'))
+    account.addTX(_txClass(0.2, 30.0, '2017-04-02-12-00', 'rebuy'))
+    account.process()
+    self.assertEqual(account.chargeable, 0)
+    return account.proceedsBetween('2017-01-01', '2017-12-31')
+
+  def test_counted_in_both_modes(self):
+    self.assertEqual(self.proceeds(Account, TX), (80.0, 2))
+    self.assertEqual(self.proceeds(FixedPointAccount, FixedPointTX), (80.0, 2))
+
+
+if __name__ == '__main__':
+  unittest.main()
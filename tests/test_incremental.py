@@ -0,0 +1,75 @@
+#
+# Incremental runs give the same totals as full runs
+#
+
+import os
+import io
+import datetime
+import unittest
+import tempfile
+import contextlib
+
+from ablib import Ledger
+from inputs import writeInputs, ledgerOptions
+
+
+class IncrementalTest(unittest.TestCase):
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    writeInputs(self.directory.name)
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def run_totals(self, **_options):
+    ledger = Ledger(**ledgerOptions(self.directory.name, **_options))
+    return ledger.totals(ledger.run())[1]
+
+  def editExport(self, _edit):
+    # _edit(lines) changes the rows of the export in place
+    filename = os.path.join(self.directory.name, 'ledgers', 'kraken.csv')
+    with open(filename) as f:
+      lines = f.readlines()
+    _edit(lines)
+    with open(filename, 'w') as f:
+      f.writelines(lines)
+
+  def assertReplayMatchesFull(self, _before):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+      incremental = self.run_totals(incremental=True)
+    self.assertIn('DEBUG: replaying ', out.getvalue())
+    full = self.run_totals()
+    self.assertNotAlmostEqual(full['profit'], _before['profit'], places=2)
+    for k in ('cost', 'profit', 'proceeds', 'chargeable', 'disposals'):
+      self.assertAlmostEqual(incremental[k], full[k], places=6, msg=k)
+
+  def test_edited_row_is_replayed(self):
+    before = self.run_totals(incremental=True)
+    def edit(lines):
+      # a BTC purchase half way through, with checkpoints before and after it
+      dateOf = lambda line: datetime.datetime.strptime(line.split(',')[0], '%d/%m/%Y %H:%M:%S')
+      buys = sorted((i for i in range(1, len(lines)) if lines[i].split(', ')[1] == 'GBP'), key=lambda i: dateOf(lines[i]))
+      i = buys[len(buys) // 2]
+      fields = lines[i].split(', ')
+      fields[4] = '%.8f\n' % (float(fields[4]) * 0.5)
+      lines[i] = ', '.join(fields)
+    self.editExport(edit)
+    self.assertReplayMatchesFull(before)
+
+  def test_inserted_row_is_replayed(self):
+    before = self.run_totals(incremental=True)
+    self.editExport(lambda lines: lines.insert(1, '15/02/2016 12:00:00, GBP, -1000.000000, BTC, 4.00000000\n'))
+    self.assertReplayMatchesFull(before)
+
+  def test_changed_bb_days_is_not_reused(self):
+    self.run_totals(incremental=True)
+    incremental = self.run_totals(incremental=True, bb_days=1)
+    full = self.run_totals(bb_days=1, snapshots=self.directory.name + '/other')
+    self.assertNotAlmostEqual(full['chargeable'], self.run_totals(snapshots=self.directory.name + '/other')['chargeable'], places=2)
+    for k in ('cost', 'profit', 'proceeds', 'chargeable', 'disposals'):
+      self.assertAlmostEqual(incremental[k], full[k], places=6, msg=k)
+
+
+if __name__ == '__main__':
+  unittest.main()
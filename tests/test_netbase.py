@@ -0,0 +1,33 @@
+#
+# Leaving the cancelling base entries of other trades out (--net-base) does
+# not change any account's figures
+#
+
+import unittest
+import tempfile
+
+from ablib import Ledger
+from inputs import writeInputs, ledgerOptions
+
+
+class NetBaseTest(unittest.TestCase):
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    writeInputs(self.directory.name)
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def test_base_account_totals_unchanged(self):
+    options = ledgerOptions(self.directory.name)
+    (rows, total) = Ledger(**options).evaluate()
+    (netRows, netTotal) = Ledger(net_base=True, **options).evaluate()
+    self.assertEqual([row['name'] for row in netRows], [row['name'] for row in rows])
+    for (row, netRow) in zip(rows, netRows):
+      for k in ('balance', 'cost', 'initialCost', 'profit', 'proceeds', 'chargeable', 'disposals'):
+        self.assertAlmostEqual(netRow[k], row[k], places=6, msg='%s %s' % (row['name'], k))
+    self.assertIn('GBP', [row['name'] for row in rows])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,38 @@
+#
+# Merged ledger output (--merged): every account's rows, in date order
+#
+
+import os
+import io
+import unittest
+import tempfile
+import contextlib
+
+from ablib import Ledger
+from inputs import writeInputs, ledgerOptions
+
+
+class MergedLedgerTest(unittest.TestCase):
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    writeInputs(self.directory.name)
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def test_rows_in_date_order(self):
+    options = ledgerOptions(self.directory.name, merged=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+      accounts = Ledger(**options).run()
+    with open(os.path.join(options['output'], 'cat_sorted.csv')) as f:
+      rows = [line.rstrip('\n').split(', ') for line in f][1:]
+    dates = [row[0] for row in rows]
+    self.assertEqual(dates, sorted(dates))
+    # each account's rows as its ledger has them
+    for a in accounts.values():
+      self.assertEqual([row[1] for row in rows if row[2] == a.name], [tx.id for tx in a.ledger], a.name)
+    self.assertEqual(len(rows), sum(len(a.ledger) for a in accounts.values()))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,71 @@
+#
+# Transfer exports: poloniex deposit and withdrawal histories (told apart by
+# file name) and the kraken ledger
+#
+
+import io
+import unittest
+import contextlib
+
+from ablib import symbols
+from ablib.parsers import parseFile
+
+POLONIEX_HEADER = 'Date,Currency,Amount,Address,Status\n'
+KRAKEN_HEADER = '"txid","refid","time","type","aclass","asset","amount","fee","balance"\n'
+
+def rows(_parsed):
+  # -> [(line, account1, currency1, amount1, account2, currency2, amount2, transfer, date)]
+  return [(ln, symbols.name(tx.account1), symbols.name(tx.curr1), round(tx.amount1, 8), symbols.name(tx.account2), symbols.name(tx.curr2), round(tx.amount2, 8), tx.isTransfer, tx.date) for (ln, tx) in _parsed]
+
+def parse(_filename, _text, _errors=None):
+  with contextlib.redirect_stdout(io.StringIO()):
+    return parseFile(_text.encode(), None, 'GBP', _filename, _errors)[0]
+
+
+class PoloniexTransfersTest(unittest.TestCase):
+  history = POLONIEX_HEADER + '2016-02-01 12:34:56,BTC,1.5,1Addr,COMPLETE\n2016-02-02 08:00:00,ETH,3.0,0xAddr,PENDING\n'
+
+  def test_deposits(self):
+    self.assertEqual(rows(parse('ledgers/poloniex.depositHistory.csv', self.history)), [
+      (2, 'BTC', 'BTC', -1.5, 'poloniexBTC', 'BTC', 1.5, True, '2016-02-01-12-00')])
+
+  def test_withdrawals_pay_a_fee(self):
+    self.assertEqual(rows(parse('ledgers/poloniex.withdrawalHistory.csv', self.history)), [
+      (2, 'GBP', 'GBP', 0.0, 'BTC', 'BTC', -0.0001, False, '2016-02-01-12-00'),
+      (2, 'poloniexBTC', 'BTC', -1.4999, 'BTC', 'BTC', 1.4999, True, '2016-02-01-12-00')])
+
+  def test_unknown_withdrawal_fee(self):
+    text = POLONIEX_HEADER + '2016-02-01 12:34:56,DOGE,100.0,DAddr,COMPLETE\n'
+    with self.assertRaises(SystemExit) as e:
+      parse('ledgers/poloniex.withdrawalHistory.csv', text)
+    self.assertIn('unknown poloniex withdrawal fee for DOGE on line 2', str(e.exception.code))
+    errors = []
+    self.assertEqual(parse('ledgers/poloniex.withdrawalHistory.csv', text, errors), [])
+    self.assertEqual(errors, [(2, 'unknown poloniex withdrawal fee for DOGE on line 2 in "ledgers/poloniex.withdrawalHistory.csv"')])
+    # deposits have no fee to know
+    self.assertEqual(len(parse('ledgers/poloniex.depositHistory.csv', text)), 1)
+
+
+class KrakenLedgerTest(unittest.TestCase):
+  def test_transfers(self):
+    text = KRAKEN_HEADER + ''.join([
+      '"L1","R1","2016-02-01 10:11:12.3","deposit","currency","XXBT","2.0","0.0","2.0"\n',
+      '"L2","R2","2016-02-02 10:00:00","trade","currency","XXBT","-1.0","0.0","1.0"\n',
+      '"L3","R3","2016-02-03 10:00:00","withdrawal","currency","XXBT","-0.5","0.001","0.499"\n',
+      '"L4","R4","2016-02-04 00:00:00","transfer","currency","XETH","1.0","0","1.0"\n',
+      '"L5","R5","2016-02-05 00:00:00","deposit","currency","KFEE","100","0","100"\n'])
+    self.assertEqual(rows(parse('ledgers/kraken.ledgers.csv', text)), [
+      (2, 'BTC', 'BTC', -2.0, 'krakenBTC', 'BTC', 2.0, True, '2016-02-01-10-00'),
+      (4, 'BTC', 'BTC', 0.5, 'krakenBTC', 'BTC', -0.5, True, '2016-02-03-10-00'),
+      (4, 'GBP', 'GBP', 0.0, 'BTC', 'BTC', -0.001, False, '2016-02-03-10-00'),
+      (5, 'GBP', 'GBP', 0.0, 'ETH', 'ETH', 1.0, False, '2016-02-04-00-00')])
+
+  def test_unknown_asset(self):
+    text = KRAKEN_HEADER + '"L1","R1","2016-02-01 10:11:12","deposit","currency","XDOG","2.0","0.0","2.0"\n'
+    with self.assertRaises(SystemExit) as e:
+      parse('ledgers/kraken.ledgers.csv', text)
+    self.assertIn("don't know the Kraken asset 'XDOG' on line 2", str(e.exception.code))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,69 @@
+#
+# Portfolio valuation series (--series) against a step by step recount
+#
+
+import os
+import io
+import math
+import unittest
+import tempfile
+import contextlib
+
+from ablib import Ledger, portfolioSeries, symbols, dateToMinutes, minutesToDate, FLOAT_ZERO
+from inputs import writeInputs, ledgerOptions
+
+
+class SeriesTest(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    cls.directory = tempfile.TemporaryDirectory()
+    writeInputs(cls.directory.name)
+    accounts = os.path.join(cls.directory.name, 'accounts.dat')
+    with open(accounts, 'w') as f:
+      f.write('krakenBTC, BTC, 2.0, GBP, 500.0\n')
+    cls.ledger = Ledger(**ledgerOptions(cls.directory.name, accounts=accounts))
+    with contextlib.redirect_stdout(io.StringIO()):
+      cls.accounts = list(cls.ledger.run().values())
+
+  @classmethod
+  def tearDownClass(cls):
+    cls.directory.cleanup()
+
+  def series(self, _step):
+    o = self.ledger.options
+    with contextlib.redirect_stdout(io.StringIO()):
+      return portfolioSeries(self.accounts, self.ledger.converter, self.ledger.baseId, o.start, o.end, _step)
+
+  def test_starts_at_the_first_trade(self):
+    # not at the accounts file rows, dated 1000-01-01
+    first = min(tx.date for a in self.accounts for tx in a.ledger if tx.date != self.ledger.options.start)
+    for (step, minutes) in (('hour', 60), ('day', 24 * 60)):
+      dates = self.series(step)[0]
+      self.assertEqual(dates[0], dateToMinutes(first) // minutes * minutes)
+      self.assertLess(len(dates), 24 * 130)
+
+  def test_columns_match_a_recount(self):
+    (dates, columns, totals) = self.series('hour')
+    btc = self.ledger.converter.conversions[symbols.pair(symbols.id('BTC'), self.ledger.baseId)]
+    for n in range(0, len(dates), 37):
+      date = minutesToDate(dates[n])
+      total = 0.0
+      for (a, c) in zip(self.accounts, columns):
+        rows = [tx for tx in a.ledger if tx.date <= date]
+        balance = sum(tx.amount for tx in rows)
+        self.assertAlmostEqual(c[0][n], balance, places=6)
+        self.assertAlmostEqual(c[1][n], sum(tx.value for tx in rows), places=6)
+        if abs(balance) < FLOAT_ZERO:
+          self.assertEqual(c[3][n], 0.0)
+        elif a.currency == 'GBP':
+          self.assertAlmostEqual(c[3][n], balance, places=6)
+        elif a.currency == 'BTC':
+          self.assertAlmostEqual(c[3][n], balance * btc[date[:-2] + '00'], places=6)
+        else:
+          self.assertTrue(math.isnan(c[3][n]), a.name) # no ETH rates
+        total += c[1][n]
+      self.assertAlmostEqual(totals[0][n], total, places=6)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,78 @@
+#
+# Query server (--serve) responses: bad dates and failing queries
+#
+
+import io
+import json
+import asyncio
+import unittest
+import tempfile
+import contextlib
+from unittest import mock
+
+from ablib import Ledger, QueryServer
+from inputs import writeInputs, ledgerOptions
+
+
+class Writer:
+  # the parts of an asyncio.StreamWriter the server uses
+  def __init__(self):
+    self.data = b''
+
+  def write(self, _data):
+    self.data += _data
+
+  async def drain(self):
+    pass
+
+  def close(self):
+    pass
+
+
+class QueryServerTest(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    cls.directory = tempfile.TemporaryDirectory()
+    writeInputs(cls.directory.name)
+    ledger = Ledger(**ledgerOptions(cls.directory.name))
+    with contextlib.redirect_stdout(io.StringIO()):
+      ledger.run()
+    cls.server = QueryServer('127.0.0.1:0', ledger)
+
+  @classmethod
+  def tearDownClass(cls):
+    cls.directory.cleanup()
+
+  def get(self, _path):
+    # -> (status code, json body)
+    async def request():
+      reader = asyncio.StreamReader()
+      reader.feed_data(('GET %s HTTP/1.0\r\nHost: test\r\n\r\n' % _path).encode())
+      reader.feed_eof()
+      writer = Writer()
+      await self.server.handle(reader, writer)
+      return writer.data
+    (head, body) = asyncio.run(request()).split(b'\r\n\r\n', 1)
+    return (int(head.split()[1]), json.loads(body))
+
+  def test_queries(self):
+    (status, body) = self.get('/gains?account=krakenBTC&start=2016-01-01-00-00&end=2016-12-31-23-59')
+    self.assertEqual(status, 200)
+    self.assertGreater(body['disposals'], 0)
+    self.assertEqual(self.get('/balance?account=krakenBTC&date=2016-02-29-12-00')[0], 200)
+
+  def test_invalid_dates(self):
+    for path in ('/balance?account=krakenBTC&date=2015-02-29-12-00', '/gains?account=krakenBTC&start=2016-13-01-00-00', '/gains?account=krakenBTC&end=tomorrow', '/convert?amount=1&from=BTC&date=2016-01-32-00-00'):
+      (status, body) = self.get(path)
+      self.assertEqual(status, 400, path)
+      self.assertIn('invalid date', body['error'])
+
+  def test_failing_query(self):
+    for (error, message) in ((ZeroDivisionError('float division by zero'), 'ZeroDivisionError: float division by zero'), (SystemExit('ERROR: no rate'), 'no rate')):
+      with mock.patch.object(self.server, 'query', side_effect=error):
+        self.assertEqual(self.get('/accounts'), (500, {'error': message}))
+    self.assertEqual(self.get('/accounts')[0], 200)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,82 @@
+#
+# --validate: every problem is reported, with an exit code bit per kind
+#
+
+import os
+import io
+import unittest
+import tempfile
+import contextlib
+
+from ablib import Ledger, exitCode, errorReport
+from ablib.validate import PARSE, VALUATION, CONSISTENCY
+from inputs import writeInputs, ledgerOptions
+
+HEADER = 'Date, From-Currency, Amount, To-Currency, Value\n'
+
+
+class ValidateTest(unittest.TestCase):
+  def setUp(self):
+    self.directory = tempfile.TemporaryDirectory()
+    writeInputs(self.directory.name)
+
+  def tearDown(self):
+    self.directory.cleanup()
+
+  def writeExport(self, _name, _rows):
+    with open(os.path.join(self.directory.name, 'ledgers', _name), 'w') as f:
+      f.write(HEADER + ''.join(_rows))
+
+  def validate(self, **_options):
+    with contextlib.redirect_stdout(io.StringIO()):
+      return Ledger(**ledgerOptions(self.directory.name, **_options)).validate()
+
+  def test_valid_inputs(self):
+    errors = self.validate()
+    self.assertEqual(errors, [])
+    self.assertEqual(exitCode(errors), 0)
+
+  def test_parse_error(self):
+    self.writeExport('kraken.bad.csv', ['01/02/2016 12:00:00, GBP, -10.0, BTC\n'])
+    errors = self.validate()
+    self.assertEqual([(e.kind, e.line) for e in errors], [(PARSE, 2)])
+    self.assertEqual(exitCode(errors), 2)
+
+  def test_valuation_error(self):
+    # neither currency has a conversion table
+    self.writeExport('kraken.bad.csv', ['01/02/2016 12:00:00, ETH, -1.0, XMR, 5.0\n'])
+    errors = self.validate()
+    self.assertEqual([(e.kind, e.line) for e in errors], [(VALUATION, 2)])
+    self.assertEqual(exitCode(errors), 4)
+
+  def test_consistency_error(self):
+    # both sides of the exchange paid in
+    self.writeExport('kraken.bad.csv', ['01/02/2016 12:00:00, GBP, 10.0, BTC, 0.03\n'])
+    errors = self.validate()
+    self.assertEqual([(e.kind, e.line) for e in errors], [(CONSISTENCY, 2)])
+    self.assertEqual(exitCode(errors), 8)
+
+  def test_all_errors_are_reported(self):
+    self.writeExport('kraken.bad.csv', [
+      '01/02/2016 12:00:00, GBP, 10.0, BTC, 0.03\n',
+      '01/02/2016 12:00:00, GBP, -10.0, BTC\n',
+      '01/02/2016 12:00:00, ETH, -1.0, XMR, 5.0\n',
+      '02/02/2016 12:00:00, GBP, -10.0, BTC, 0.03\n'])
+    accounts = os.path.join(self.directory.name, 'accounts.dat')
+    with open(accounts, 'w') as f:
+      f.write('BTC, BTC, 1.0, EUR, 300.0\n')
+    errors = self.validate(accounts=accounts)
+    self.assertEqual(sorted((os.path.basename(e.filename), e.line, e.kind) for e in errors), [('accounts.dat', 1, CONSISTENCY), ('kraken.bad.csv', 2, CONSISTENCY), ('kraken.bad.csv', 3, PARSE), ('kraken.bad.csv', 4, VALUATION)])
+    self.assertEqual(exitCode(errors), PARSE | VALUATION | CONSISTENCY)
+    report = errorReport(errors, 3).split('\n')
+    self.assertEqual([line.split(': ')[0].split('/')[-1] for line in report[:-1]], ['accounts.dat:1', 'kraken.bad.csv:2', 'kraken.bad.csv:3', 'kraken.bad.csv:4'])
+    self.assertEqual(report[-1], '1 parse, 1 valuation, 2 consistency error(s) in 3 file(s)')
+
+  def test_invalid_run_dates(self):
+    with self.assertRaises(SystemExit) as e:
+      self.validate(start='2015-02-29-00-00')
+    self.assertEqual(str(e.exception.code), 'ERROR: invalid date "2015-02-29-00-00"')
+
+
+if __name__ == '__main__':
+  unittest.main()